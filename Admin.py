@@ -1,6 +1,107 @@
 import streamlit as st
+import glob
+import os
+import pstats
 import pandas as pd
+from io import BytesIO, StringIO
 from penalty import simulate_fadzly_algorithm  # ✅ Import the new function
+from BattleLog import job_running, show_job_status
+from battle_archive import BattleArchive
+from engine import MODES
+from ingest import read_upload, validate
+from loaders import RESULTS_DB_PATH, clear_results, load_submissions
+from perf import METRICS_FILE, PERF_DIR, history_frame, read_history
+from results_db import ResultsDB
+from rules import CURRENT, RULESETS, get_ruleset
+from store import SubmissionStore
+from sweep import CONFIG_COLUMNS, config_grid, ruleset_config, sweep
+from table_view import FrameSource, show_table
+
+PROFILE_TOP_FUNCTIONS = 30
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def check_upload(data, name):
+    return validate(read_upload(BytesIO(data), name))
+
+def show_bulk_upload():
+    st.subheader("📤 Bulk Upload")
+    upload = st.file_uploader("Monthly QC workbook or CSV", type=["xlsx", "xlsm", "xls", "csv"])
+    if upload is None:
+        return
+
+    result = check_upload(upload.getvalue(), upload.name)
+    st.write(f"✅ {len(result.accepted):,} valid rows, ❌ {len(result.rejected):,} rejected.")
+    if not result.rejected.empty:
+        st.dataframe(result.rejected)
+        report = result.rejected.to_csv(index=False).encode("utf-8")
+        st.download_button("📄 Download Rejection Report", report, "llkk_rejected_rows.csv", "text/csv")
+
+    if not result.accepted.empty and st.button(f"📥 Add {len(result.accepted):,} Rows to Submissions"):
+        SubmissionStore().append(result.accepted)
+        st.session_state["llkk_data"] = load_submissions()
+        st.success("✅ Rows added to the submission store.")
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def profile_summary(path, mtime):
+    out = StringIO()
+    pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    return out.getvalue()
+
+def show_performance():
+    st.subheader("⏱️ Performance")
+    history = read_history()
+    if not history:
+        st.info("No runs recorded yet. Timings appear after the next simulation or data load.")
+        return
+
+    # Latest run first; one column per stage
+    st.dataframe(history_frame(history).iloc[::-1], hide_index=True)
+
+    latest = next((entry for entry in reversed(history) if entry["kind"] == "simulation"), None)
+    if latest is not None:
+        st.markdown(f"#### Last simulation ({latest['wall']:.2f}s)")
+        st.bar_chart(pd.Series({name: timing["seconds"] for name, timing in latest["stages"].items()},
+                               name="Seconds"))
+        # Only runs whose peak was reset per stage carry a stage figure
+        stage_peaks = {name: timing["peak_rss_mb"] for name, timing in latest["stages"].items()
+                       if "peak_rss_mb" in timing}
+        if latest.get("peak_rss_scope") == "run" and stage_peaks:
+            st.bar_chart(pd.Series(stage_peaks, name="Peak RSS (MB)"))
+
+    with open(METRICS_FILE, "rb") as f:
+        st.download_button("📄 Download Metrics Log", f, "llkk_metrics.jsonl", "application/json")
+
+    profiles = sorted(glob.glob(os.path.join(PERF_DIR, "*.prof")), key=os.path.getmtime, reverse=True)
+    if profiles:
+        path = st.selectbox("🔬 cProfile captures", profiles, format_func=os.path.basename)
+        st.code(profile_summary(path, os.path.getmtime(path)))
+        with open(path, "rb") as f:
+            st.download_button("📥 Download Profile", f, os.path.basename(path), "application/octet-stream")
+
+def show_sweep(df, ruleset):
+    with st.expander("🎛️ Scoring Sweep"):
+        st.caption("Rerun the season under many scoring settings in one pass and see how far each "
+                   f"ranking moves from ruleset {ruleset.version}'s. Separate values with commas.")
+        with st.form("scoring_sweep"):
+            cols = st.columns(len(CONFIG_COLUMNS))
+            values = [col.text_input(name, str(default))
+                      for col, name, default in zip(cols, CONFIG_COLUMNS, ruleset_config(ruleset))]
+            mode = st.selectbox("Battle mode", MODES)
+            submitted = st.form_submit_button("▶️ Run Sweep")
+        if not submitted:
+            return
+
+        try:
+            axes = [[float(v) for v in text.split(",") if v.strip()] for text in values]
+        except ValueError:
+            st.error("🚫 Every setting must be a comma-separated list of numbers.")
+            return
+        configs = config_grid(*axes)
+        with st.spinner(f"Simulating {len(configs)} configurations..."):
+            result = sweep(df, configs, ruleset.expected_parameters, ruleset, mode=mode)
+        st.dataframe(result.stability, hide_index=True)
+        st.download_button("📤 Download Sweep Results", result.stability.to_csv(index=False).encode("utf-8"),
+                           "llkk_scoring_sweep.csv", "text/csv")
 
 def run():
     st.title("🛡️ Admin Control Center")
@@ -12,15 +113,35 @@ def run():
     # View all LLKK data
     if "llkk_data" in st.session_state:
         st.subheader("📋 All Submitted Data")
-        st.dataframe(st.session_state["llkk_data"])
+        show_table(FrameSource(st.session_state["llkk_data"]), "admin_submissions")
     else:
         st.info("No lab data submitted yet.")
 
+    show_bulk_upload()
+
     # Trigger Fadzly Algorithm with penalty
     st.subheader("⚔️ Simulate Battles Across All Labs")
-    if st.button("🚀 Start Battle Simulation Now"):
-        simulate_fadzly_algorithm(st.session_state["llkk_data"])  # ✅ Call from penalty.py
-        st.success("✅ Battle simulation complete!")
+    # 📜 Results remember their ruleset, so older ones can be reproduced
+    stored = ResultsDB(RESULTS_DB_PATH).ruleset()
+    if stored is not None:
+        st.caption(f"📜 Current results were computed with ruleset {stored.version}.")
+    versions = list(RULESETS)
+    ruleset = st.selectbox("📜 Scoring ruleset", versions, index=versions.index(CURRENT.version))
+    profile = st.checkbox("🔬 Capture a cProfile of this run")
+    if st.button("🚀 Start Battle Simulation Now", disabled=job_running()):
+        simulate_fadzly_algorithm(st.session_state["llkk_data"], profile=profile, ruleset=ruleset)  # ✅ Call from penalty.py
+    show_job_status()
+
+    # Biggest rating swings from the battle archive
+    swings = BattleArchive().top_swings(20)
+    if not swings.empty:
+        st.subheader("📉 Biggest Rating Swings")
+        st.dataframe(swings)
+
+    if "llkk_data" in st.session_state:
+        show_sweep(st.session_state["llkk_data"], get_ruleset(ruleset))
+
+    show_performance()
 
     # Export CSV of full data
     if "llkk_data" in st.session_state:
@@ -29,8 +150,8 @@ def run():
 
     # Reset all data (danger zone)
     st.subheader("🧨 Danger Zone")
-    if st.button("❌ Clear All LLKK Data"):
-        del st.session_state["llkk_data"]
-        for key in ["fadzly_battles", "elo_history", "elo_progression"]:
-            st.session_state.pop(key, None)
+    if st.button("❌ Clear All LLKK Data", disabled=job_running()):
+        st.session_state.pop("llkk_data", None)
+        clear_results()
+        BattleArchive().clear()
         st.success("All LLKK and battle data has been reset.")
@@ -1,16 +1,46 @@
 import streamlit as st
-import pandas as pd
 import altair as alt
 
+from loaders import shared_results
+from table_view import FrameSource, show_table
+
+MAX_COMPARE_LABS = 10
+
+def show_lab_comparison(index, leaderboard, param, level):
+    st.subheader("📊 Compare Labs")
+    top_labs = [lab for lab in leaderboard["Lab"].head(5) if lab in index.labs]
+    labs = st.multiselect("Labs", index.labs, default=top_labs, max_selections=MAX_COMPARE_LABS)
+
+    # Every lab is summarised as a per-month band; only the chosen labs are sent as lines
+    band = index.envelope(param, level)
+    if band.empty:
+        st.info("ℹ️ No rating data available for this combination.")
+        return
+
+    month_axis = alt.X("Month:N", sort=index.months)
+    spread = alt.Chart(band).mark_area(opacity=0.15).encode(
+        x=month_axis, y="Min:Q", y2="Max:Q", tooltip=["Month", "Min", "Median", "Max", "Labs"]
+    )
+    quartiles = alt.Chart(band).mark_area(opacity=0.25).encode(x=month_axis, y="Q1:Q", y2="Q3:Q")
+    median = alt.Chart(band).mark_line(strokeDash=[4, 4], color="gray").encode(x=month_axis, y="Median:Q")
+    lines = alt.Chart(index.compare(labs, param, level)).mark_line(point=True).encode(
+        x=month_axis, y=alt.Y("Elo:Q", title="Elo"), color="Lab:N", tooltip=["Lab", "Month", "Elo"]
+    )
+    st.altair_chart(
+        (spread + quartiles + median + lines).properties(title=f"{param} {level} — all labs vs selected", height=400),
+        use_container_width=True
+    )
+
 def run():
     st.title("👑 LLKK Champion Board")
 
-    # Check if results are available
-    if "fadzly_battles" not in st.session_state:
+    # Results are published once per simulation and shared by every session
+    results = shared_results()
+    if results is None:
         st.warning("⚠️ Battle not simulated yet. Please run the simulation from the Admin tab.")
         return
 
-    df = st.session_state["fadzly_battles"]
+    df = results.leaderboard
     st.subheader("🏅 Final Rankings (Elo + Bonus)")
     st.dataframe(df, use_container_width=True)
 
@@ -25,28 +55,21 @@ def run():
     """, unsafe_allow_html=True)
 
     # 📈 Elo Progression Chart
-    if "elo_progression" in st.session_state:
+    if not results.progression.empty:
         st.subheader("📈 Elo Rating Progression")
 
-        prog_df = st.session_state["elo_progression"]
-        labs = prog_df["Lab"].unique().tolist()
-        parameters = prog_df["Parameter"].unique().tolist()
-        levels = prog_df["Level"].unique().tolist()
+        index = results.progression_index
 
         col1, col2, col3 = st.columns(3)
-        selected_lab = col1.selectbox("Select Lab", labs)
-        selected_param = col2.selectbox("Select Parameter", parameters)
-        selected_level = col3.selectbox("Select Level", levels)
+        selected_lab = col1.selectbox("Select Lab", index.labs)
+        selected_param = col2.selectbox("Select Parameter", index.params)
+        selected_level = col3.selectbox("Select Level", index.levels)
 
-        filtered = prog_df[
-            (prog_df["Lab"] == selected_lab) &
-            (prog_df["Parameter"] == selected_param) &
-            (prog_df["Level"] == selected_level)
-        ].sort_values("Month")
+        filtered = index.series(selected_lab, selected_param, selected_level)
 
         if not filtered.empty:
             chart = alt.Chart(filtered).mark_line(point=True).encode(
-                x="Month:N",
+                x=alt.X("Month:N", sort=index.months),
                 y="Elo:Q",
                 tooltip=["Month", "Elo"]
             ).properties(
@@ -58,6 +81,11 @@ def run():
         else:
             st.info("ℹ️ No rating data available for this combination.")
 
+        show_lab_comparison(index, df, selected_param, selected_level)
+
+        with st.expander("🗂️ Progression Data"):
+            show_table(FrameSource(results.progression), "progression")
+
     # Footer
     st.markdown(
         "<div style='text-align: center; color: gray;'>© 2025 Lab Legend Kingdom Kvalis — Powered by MEQARE</div>",
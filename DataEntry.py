@@ -1,9 +1,56 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import os
 
-DATA_DIR = "data"
+from engine import MONTHS
+from ingest import validate
+from loaders import load_submissions
+from rules import CURRENT
+from store import COLUMNS, SubmissionStore
+
+EDIT_COLUMNS = COLUMNS[1:]
+
+# ✅ Canonical names, so entries match the EFLM targets and the penalty list
+PARAMETERS = sorted(CURRENT.parameters)
+LEVELS = ["L1", "L2"]
+
+def ratio(df):
+    n_qc = pd.to_numeric(df["n (QC)"], errors="coerce")
+    days = pd.to_numeric(df["Working Days"], errors="coerce")
+    return (n_qc / days.where(days > 0)).round(2)
+
+def apply_edits(base, edits):
+    """
+    Apply ``st.data_editor``'s edited, added and deleted rows to ``base``.
+    Returns the edited frame, the rows that changed and the months they touch.
+    """
+    df = base.copy()
+    months = set()
+    changed = []
+
+    for pos, values in edits.get("edited_rows", {}).items():
+        pos = int(pos)
+        months.add(df.at[pos, "Month"])
+        for col, value in values.items():
+            df.at[pos, col] = value
+        months.add(df.at[pos, "Month"])
+        changed.append(pos)
+
+    deleted = [int(pos) for pos in edits.get("deleted_rows", [])]
+    months.update(df.loc[deleted, "Month"])
+
+    added = pd.DataFrame(edits.get("added_rows", []), columns=EDIT_COLUMNS)
+    months.update(added["Month"].dropna())
+
+    kept = df.drop(index=deleted)
+    changed = [pos for pos in changed if pos not in deleted]
+    df = pd.concat([kept, added], ignore_index=True)
+    df["Ratio"] = ratio(df)
+
+    # Positions of the edited and added rows in the new frame
+    new_pos = pd.Series(np.arange(len(kept)), index=kept.index)
+    changed = new_pos[changed].tolist() + list(range(len(kept), len(df)))
+    return df, df.iloc[changed], {month for month in months if pd.notna(month)}
 
 def run():
     st.title("📋 LLKK Direct Data Entry")
@@ -14,62 +61,61 @@ def run():
 
     lab = st.session_state["logged_in_lab"]
 
-    # Show previously submitted data
-    file_path = os.path.join(DATA_DIR, f"submission_{lab}.csv")
-    if os.path.exists(file_path):
-        st.markdown("### 📂 Previously Submitted Data")
-        prev_df = pd.read_csv(file_path)
-        st.dataframe(prev_df)
-
-    parameters = sorted([
-        "Albumin", "ALT", "AST", "Bilirubin (Total)", "Cholesterol",
-        "Creatinine", "Direct Bilirubin", "GGT", "Glucose", "HDL Cholesterol",
-        "LDL Cholesterol", "Potassium", "Protein (Total)", "Sodium",
-        "Triglycerides", "Urea", "Uric Acid"
-    ])
-    levels = ["L1", "L2"]
-    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", 
-              "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-
-    num_rows = st.number_input("🔢 How many entries to input?", min_value=1, max_value=50, value=5, step=1)
+    store = SubmissionStore()
+
+    # Previously submitted data is the starting point of the grid
+    prev_df = load_submissions(labs=[lab], store=store)
+    base = prev_df[EDIT_COLUMNS].astype({col: object for col in ["Parameter", "Level", "Month"]})
+    month_rank = base["Month"].map({month: i for i, month in enumerate(MONTHS)})
+    base = base.assign(rank=month_rank).sort_values(["rank", "Parameter", "Level"])
+    base = base.drop(columns="rank").reset_index(drop=True)
 
     st.subheader(f"📝 Enter Data for: :green[{lab}]")
+    st.caption("Add, edit or delete rows, then save. Ratio is worked out from n (QC) / Working Days.")
+
+    # A new key after each save starts the grid fresh from the stored rows
+    version = st.session_state.setdefault("data_entry_version", 0)
+    grid_key = f"data_entry_grid_{version}"
+    st.data_editor(
+        base,
+        key=grid_key,
+        num_rows="dynamic",
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Parameter": st.column_config.SelectboxColumn(
+                "Parameter", options=sorted(set(PARAMETERS) | set(base["Parameter"])), required=True),
+            "Level": st.column_config.SelectboxColumn("Level", options=LEVELS, required=True),
+            "Month": st.column_config.SelectboxColumn("Month", options=MONTHS, required=True),
+            "CV (%)": st.column_config.NumberColumn("CV (%)", min_value=0.0, max_value=100.0, format="%.2f"),
+            "n (QC)": st.column_config.NumberColumn("n (QC)", min_value=0, max_value=100, step=1),
+            "Working Days": st.column_config.NumberColumn("Working Days", min_value=1, max_value=31, step=1),
+            "Ratio": st.column_config.NumberColumn("Ratio", disabled=True, format="%.2f"),
+        },
+    )
+
+    # Only the editor's diff is applied; unchanged rows are never rebuilt from widgets
+    edits = st.session_state.get(grid_key, {})
+    df, changed, months = apply_edits(base, edits)
+    df.insert(0, "Lab", lab)
+    changed = changed.assign(Lab=lab)[COLUMNS]
+    deleted = len(edits.get("deleted_rows", []))
+
+    if len(changed) or deleted:
+        st.subheader("📊 Pending Changes")
+        st.write(f"✏️ {len(changed)} new or edited rows, 🗑️ {deleted} deleted.")
+        st.dataframe(changed, hide_index=True)
 
-    input_data = []
-    for i in range(num_rows):
-        cols = st.columns(7)
-        parameter = cols[0].selectbox("Parameter", parameters, key=f"param_{i}")
-        level = cols[1].selectbox("Level", levels, key=f"level_{i}")
-        month = cols[2].selectbox("Month", months, key=f"month_{i}")
-        cv = cols[3].number_input("CV (%)", min_value=0.0, max_value=100.0, key=f"cv_{i}")
-        n_qc = cols[4].number_input("n (QC)", min_value=0, max_value=100, key=f"n_{i}")
-        wd = cols[5].number_input("Working Days", min_value=1, max_value=31, key=f"wd_{i}")
-        ratio = round(n_qc / wd, 2) if n_qc > 0 and wd > 0 else 0.0
-        cols[6].number_input("Ratio", value=ratio, disabled=True, key=f"ratio_{i}")
-
-        input_data.append({
-            "Lab": lab,
-            "Parameter": parameter,
-            "Level": level,
-            "Month": month,
-            "CV (%)": cv,
-            "n (QC)": n_qc,
-            "Working Days": wd,
-            "Ratio": ratio
-        })
-
-    df = pd.DataFrame(input_data)
-    df = df[(df["CV (%)"] > 0) & (df["n (QC)"] > 0) & (df["Working Days"] > 0)]
-
-    st.subheader("📊 Preview of Valid Entries")
-    st.dataframe(df)
-
-    # Save lab data to individual file
-    if not df.empty:
-        os.makedirs(DATA_DIR, exist_ok=True)
-        file_path = os.path.join(DATA_DIR, f"submission_{lab}.csv")
-        df.to_csv(file_path, index=False)
-        st.success(f"✅ Data saved successfully for {lab}!")
+        result = validate(df)
+        if not result.rejected.empty:
+            st.error("🚫 Fix these rows before saving:")
+            st.dataframe(result.rejected, hide_index=True)
+        elif st.button("💾 Save Changes"):
+            # Only the months touched by the edit are rewritten
+            store.replace_lab_months(lab, result.accepted, months)
+            st.session_state["data_entry_version"] = version + 1
+            st.success(f"✅ Data saved successfully for {lab}!")
+            st.rerun()
 
     # Export single CSV (optional)
     csv = df.to_csv(index=False).encode("utf-8")
@@ -1,38 +1,71 @@
 # Download.py
 
+import os
+
 import streamlit as st
-import pandas as pd
-from io import BytesIO
 
-st.set_page_config(page_title="Download", layout="wide", page_icon="📁")
-st.title("📥 Download Final Elo Table")
+from battle_archive import BattleArchive
+from export import cached_export, export_path, results_version, write_csv, write_workbook
+from loaders import fingerprint, shared_results
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+REPORT_FILE = "LLKK_Report.xlsx"
+BATTLES_FILE = "LLKK_Battle_Log.csv"
+
+def download(label, path, file_name, mime):
+    with open(path, "rb") as f:
+        st.download_button(label, data=f, file_name=file_name, mime=mime)
+
+def run():
+    st.title("📥 Download Final Elo Table")
+
+    results = shared_results()
+    if results is None:
+        st.warning("⚠️ No battle results found. Please run the simulation first from the Admin tab.")
+        st.stop()
+
+    # Exports are built once per results version and served from disk afterwards
+    archive = BattleArchive()
+    version = results_version((("results", results.revision),) + fingerprint(archive.files()))
+    data, rankings = results.leaderboard, results.rankings
 
-if "fadzly_battles" not in st.session_state:
-    st.warning("⚠️ No battle results found. Please run the simulation first from the Admin tab.")
-    st.stop()
+    # Preview in app
+    st.subheader("📊 Preview of Final Rankings")
+    st.dataframe(data, use_container_width=True)
 
-data = st.session_state["fadzly_battles"]
+    excel_path = cached_export(version, "LLKK_Final_Elo.xlsx",
+                               lambda path: write_workbook(path, [("LLKK_Final_Elo", data)]))
+    csv_path = cached_export(version, "LLKK_Final_Elo.csv", lambda path: write_csv(path, data))
 
-# Preview in app
-st.subheader("📊 Preview of Final Rankings")
-st.dataframe(data, use_container_width=True)
+    # Download buttons
+    download("📥 Download Excel File", excel_path, "LLKK_Final_Elo.xlsx", XLSX_MIME)
+    download("📥 Download CSV File", csv_path, "LLKK_Final_Elo.csv", "text/csv")
 
-# Excel conversion
-def to_excel(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='LLKK_Final_Elo')
-    return output.getvalue()
+    # 📚 Full report: large sheets are streamed to disk, so they are only built on request
+    st.subheader("📚 Full Report")
+    st.caption("Leaderboard, per-parameter rankings, Elo progression and the full battle log.")
 
-excel_data = to_excel(data)
-csv_data = data.to_csv(index=False).encode("utf-8")
+    report_path = export_path(version, REPORT_FILE)
+    if not os.path.exists(report_path) and st.button("🛠️ Build Report Workbook"):
+        with st.spinner("Writing report workbook..."):
+            cached_export(version, REPORT_FILE, lambda path: write_workbook(path, [
+                ("Leaderboard", data),
+                ("Rankings", rankings),
+                ("Progression", results.progression),
+                ("Battles", archive.batches()),
+            ]))
+    if os.path.exists(report_path):
+        download("📥 Download Report Workbook", report_path, REPORT_FILE, XLSX_MIME)
 
-# Download buttons
-st.download_button("📥 Download Excel File", data=excel_data, file_name="LLKK_Final_Elo.xlsx")
-st.download_button("📥 Download CSV File", data=csv_data, file_name="LLKK_Final_Elo.csv", mime="text/csv")
+    battles_path = export_path(version, BATTLES_FILE)
+    if not os.path.exists(battles_path) and st.button("🛠️ Build Battle Log CSV"):
+        with st.spinner("Writing battle log..."):
+            cached_export(version, BATTLES_FILE, lambda path: write_csv(path, archive.batches()))
+    if os.path.exists(battles_path):
+        download("📥 Download Battle Log CSV", battles_path, BATTLES_FILE, "text/csv")
 
-# Footer
-st.markdown("<hr style='margin-top: 2rem; margin-bottom: 1rem;'>"
-            "<div style='text-align: center; color: gray;'>"
-            "© 2025 Lab Legend Kingdom Kvalis — Powered by MEQARE"
-            "</div>", unsafe_allow_html=True)
+    # Footer
+    st.markdown("<hr style='margin-top: 2rem; margin-bottom: 1rem;'>"
+                "<div style='text-align: center; color: gray;'>"
+                "© 2025 Lab Legend Kingdom Kvalis — Powered by MEQARE"
+                "</div>", unsafe_allow_html=True)
@@ -1,10 +1,16 @@
 import streamlit as st
-from PIL import Image
+from assets import HEADER_IMAGE, HEADER_WIDTH, build_variant
 from Login import run_login  # Sidebar login
 
 # ✅ Must be the first Streamlit command
 st.set_page_config(page_title="LLKK - Lab Legend Kingdom Kvalis", layout="wide")
 
+@st.cache_resource(max_entries=8, show_spinner=False)
+def read_asset(path):
+    # One copy of each compressed image per server, reused by every rerun and session
+    with open(path, "rb") as f:
+        return f.read()
+
 # 🔐 Run sidebar login
 run_login()
 
@@ -24,11 +30,10 @@ else:
 # 👑 Navigation
 menu = st.sidebar.selectbox("🔍 Navigate LLKK Features", menu_options)
 
-# 🚦 Routing Logic
+# 🚦 Routing Logic: each page (and pandas, altair, xlsxwriter...) is only imported once it is opened
 if menu == "Home":
     st.success("Welcome to LLKK! Use the sidebar to explore features.")
-    img = Image.open("Header.png")
-    st.image(img, use_container_width=True)
+    st.image(read_asset(build_variant(HEADER_IMAGE, HEADER_WIDTH)), use_container_width=True)
 
 elif menu == "Data Entry":
     from DataEntry import run as run_dataentry
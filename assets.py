@@ -0,0 +1,71 @@
+"""
+Resized, compressed copies of the app's images.
+
+The PNGs shipped with the app are 1.5-2.7 MB each. Each one is written once
+per display width to ``data/assets`` as WebP and served from there. A
+variant's name includes the source's mtime and size, so replacing an image
+produces new variants.
+"""
+import glob
+import os
+import tempfile
+
+ASSETS_DIR = os.path.join("data", "assets")
+WEBP_QUALITY = 80
+
+HEADER_IMAGE = "Header.png"
+HEADER_WIDTH = 1200
+
+# Source image -> widths a page displays it at
+ASSETS = {
+    HEADER_IMAGE: [HEADER_WIDTH],
+}
+
+
+def variant_path(source, width):
+    info = os.stat(source)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(ASSETS_DIR, f"{stem}-{width}w-{info.st_mtime_ns:x}-{info.st_size:x}.webp")
+
+
+def build_variant(source, width, quality=WEBP_QUALITY):
+    """
+    Path of ``source`` scaled down to at most ``width`` pixels wide as WebP.
+    Only the first call decodes the image; later ones cost a stat().
+    """
+    path = variant_path(source, width)
+    if os.path.exists(path):
+        return path
+
+    # Pillow is only needed when a variant is missing
+    from PIL import Image
+
+    os.makedirs(ASSETS_DIR, exist_ok=True)
+    with Image.open(source) as img:
+        img = img.convert("RGBA" if "A" in img.getbands() or img.mode == "P" else "RGB")
+        img.thumbnail((width, img.height), Image.LANCZOS)
+        # Sessions are threads of one process: each writes its own temporary file
+        fd, tmp = tempfile.mkstemp(dir=ASSETS_DIR, suffix=".tmp")
+        os.close(fd)
+        try:
+            img.save(tmp, "WEBP", quality=quality, method=6)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    # Variants of an older copy of the image are no longer reachable
+    stem = os.path.splitext(os.path.basename(source))[0]
+    for old in glob.glob(os.path.join(ASSETS_DIR, f"{stem}-{width}w-*.webp")):
+        if old != path:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def build_all(assets=ASSETS):
+    """Write every missing variant in ``assets``; returns their paths."""
+    return [build_variant(source, width) for source, widths in assets.items() if os.path.exists(source)
+            for width in widths]
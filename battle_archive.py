@@ -0,0 +1,248 @@
+import glob
+import os
+import shutil
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from engine import calendar_order
+
+BATTLES_DIR = os.path.join("data", "battles")
+CHUNK_ROWS = 50_000
+
+# Month is the partition key, so it is not stored inside the files
+FILE_SCHEMA = pa.schema([
+    ("Lab_A", pa.string()), ("Lab_B", pa.string()),
+    ("Parameter", pa.string()), ("Level", pa.string()),
+    ("CV_A", pa.float64()), ("CV_B", pa.float64()),
+    ("Ratio_A", pa.float64()), ("Ratio_B", pa.float64()),
+    ("Bonus_A", pa.int64()), ("Penalty_A", pa.int64()),
+    ("Bonus_B", pa.int64()), ("Penalty_B", pa.int64()),
+    ("Updated_Rating_A", pa.float64()), ("Updated_Rating_B", pa.float64()),
+    ("Change_A", pa.float64()), ("Change_B", pa.float64()),
+])
+SCHEMA = FILE_SCHEMA.insert(4, pa.field("Month", pa.string()))
+# The engine keeps these as float32 after rounding; widening re-rounds so the files hold the exact values
+FLOAT32_DECIMALS = {"Updated_Rating_A": 1, "Updated_Rating_B": 1, "Change_A": 2, "Change_B": 2}
+PARTITIONING = ds.partitioning(pa.schema([("Month", pa.string())]), flavor="hive")
+
+
+class _MonthWriter:
+    """Buffers battle frames and flushes them as compressed Parquet row groups."""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._pending = []
+        self._pending_rows = 0
+        self._writer = pq.ParquetWriter(path, FILE_SCHEMA, compression="zstd")
+
+    def write(self, frame):
+        """Frames may be views of a buffer the engine reuses, so anything kept past this call is copied."""
+        if len(frame) >= CHUNK_ROWS:
+            self.flush()
+            for start in range(0, len(frame), CHUNK_ROWS):
+                self._write_chunk(frame.iloc[start:start + CHUNK_ROWS])
+            return
+        self._pending.append(frame.copy())
+        self._pending_rows += len(frame)
+        if self._pending_rows >= CHUNK_ROWS:
+            self.flush()
+
+    def _write_chunk(self, chunk):
+        arrays = []
+        for field in FILE_SCHEMA:
+            column = chunk[field.name]
+            if field.name in FLOAT32_DECIMALS and column.dtype == "float32":
+                column = column.astype("float64").round(FLOAT32_DECIMALS[field.name])
+            # Categoricals arrive as dictionary arrays and are decoded by the cast
+            arrays.append(pa.array(column, from_pandas=True).cast(field.type))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=FILE_SCHEMA))
+        self.rows += len(chunk)
+
+    def flush(self):
+        if not self._pending:
+            return
+        self._write_chunk(pd.concat(self._pending, ignore_index=True))
+        self._pending = []
+        self._pending_rows = 0
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+
+class BattleArchive:
+    """
+    Pairwise battle logs on disk as ``<root>/Month=<month>/<part>.parquet``.
+
+    Simulations stream each month's battles into its partition in chunks, and
+    pages query just the slice they display. A serial run writes one
+    ``battles`` part per month; sharded runs write one part per shard.
+    """
+
+    def __init__(self, root=BATTLES_DIR):
+        self.root = root
+
+    def _month_dir(self, month):
+        return os.path.join(self.root, f"Month={quote(str(month), safe='')}")
+
+    def _path(self, month, part):
+        return os.path.join(self._month_dir(month), f"{quote(str(part), safe='')}.parquet")
+
+    def files(self, months=None):
+        """Parquet files of ``months`` (all by default), month by month in calendar order."""
+        if months is None:
+            months = [unquote(os.path.basename(month_dir).split("=", 1)[1])
+                      for month_dir in glob.glob(os.path.join(self.root, "Month=*"))]
+        paths = []
+        for month in calendar_order(months):
+            paths.extend(sorted(glob.glob(os.path.join(self._month_dir(month), "*.parquet"))))
+        return paths
+
+    def months(self):
+        month_dirs = dict.fromkeys(os.path.basename(os.path.dirname(path)) for path in self.files())
+        return [unquote(month_dir.split("=", 1)[1]) for month_dir in month_dirs]
+
+    # --- Writes ---
+    @contextmanager
+    def month_writer(self, month, part="battles"):
+        """Write one part of ``month``'s battles; the file only appears once it completes."""
+        path = self._path(month, part)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        writer = _MonthWriter(path + ".tmp")
+        try:
+            yield writer
+            writer.close()
+        except BaseException:
+            writer._writer.close()
+            os.remove(writer.path)
+            raise
+        os.replace(writer.path, path)
+
+    def retain(self, months):
+        """Delete every month partition not listed in ``months``."""
+        keep = set(map(self._month_dir, months))
+        for path in self.files():
+            if os.path.dirname(path) not in keep:
+                os.remove(path)
+
+    def clear(self):
+        self.retain([])
+
+    def publish(self, staging, keep):
+        """
+        Keep only the ``keep`` months, then move every month of the ``staging``
+        archive in, one directory rename per month. Removes ``staging``.
+        """
+        self.retain(keep)
+        os.makedirs(self.root, exist_ok=True)
+        for month in staging.months():
+            target = self._month_dir(month)
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(staging._month_dir(month), target)
+        shutil.rmtree(staging.root, ignore_errors=True)
+
+    # --- Reads ---
+    def _dataset(self, months=None):
+        paths = self.files(months)
+        if not paths:
+            return None
+        return ds.dataset(paths, format="parquet", schema=SCHEMA,
+                          partitioning=PARTITIONING, partition_base_dir=self.root)
+
+    @staticmethod
+    def _filter(labs=None, parameters=None, levels=None):
+        condition = None
+        for expr in [
+            None if labs is None else ds.field("Lab_A").isin(list(labs)) | ds.field("Lab_B").isin(list(labs)),
+            None if parameters is None else ds.field("Parameter").isin(list(parameters)),
+            None if levels is None else ds.field("Level").isin(list(levels)),
+        ]:
+            if expr is not None:
+                condition = expr if condition is None else condition & expr
+        return condition
+
+    def query(self, labs=None, parameters=None, levels=None, months=None, columns=None, limit=None, offset=0):
+        """
+        Battles involving ``labs`` (as either side) for the given parameters,
+        levels and months. Months prune whole partitions; the rest is pushed
+        into the Parquet scan. ``offset`` skips that many matching rows and
+        ``limit`` stops reading after that many more.
+        """
+        columns = list(columns) if columns is not None else SCHEMA.names
+        dataset = self._dataset(months)
+        if dataset is None:
+            return pd.DataFrame(columns=columns)
+
+        condition = self._filter(labs, parameters, levels)
+        if offset:
+            return self._slice(dataset, columns, condition, offset, limit)
+        if limit is None:
+            table = dataset.to_table(columns=columns, filter=condition)
+        else:
+            table = dataset.head(limit, columns=columns, filter=condition)
+        return table.to_pandas()
+
+    @staticmethod
+    def _slice(dataset, columns, condition, offset, limit):
+        # Skipped rows are only counted; just the requested slice is converted
+        batches = []
+        for batch in dataset.to_batches(columns=columns, filter=condition, batch_size=CHUNK_ROWS):
+            if offset >= batch.num_rows:
+                offset -= batch.num_rows
+                continue
+            batch = batch.slice(offset, limit)
+            offset = 0
+            batches.append(batch)
+            if limit is not None:
+                limit -= batch.num_rows
+                if not limit:
+                    break
+        if not batches:
+            return pd.DataFrame(columns=columns)
+        return pa.Table.from_batches(batches).to_pandas()
+
+    def count(self, labs=None, parameters=None, levels=None, months=None):
+        """Number of battles ``query`` would return without a limit."""
+        dataset = self._dataset(months)
+        if dataset is None:
+            return 0
+        return dataset.count_rows(filter=self._filter(labs, parameters, levels))
+
+    def batches(self, months=None, columns=None, batch_size=CHUNK_ROWS):
+        """
+        Yield the archive as DataFrames of at most ``batch_size`` rows, month
+        by month in the given order (calendar order by default).
+        """
+        columns = list(columns) if columns is not None else SCHEMA.names
+        for month in (self.months() if months is None else months):
+            dataset = self._dataset([month])
+            if dataset is None:
+                continue
+            for batch in dataset.to_batches(columns=columns, batch_size=batch_size):
+                if batch.num_rows:
+                    yield batch.to_pandas()
+
+    def top_swings(self, n=20, labs=None, parameters=None, levels=None, months=None):
+        """The ``n`` battles with the largest rating change on either side."""
+        dataset = self._dataset(months)
+        if dataset is None:
+            return pd.DataFrame(columns=SCHEMA.names + ["Swing"])
+
+        top = None
+        scanner = dataset.scanner(filter=self._filter(labs, parameters, levels), batch_size=CHUNK_ROWS)
+        for batch in scanner.to_batches():
+            if not batch.num_rows:
+                continue
+            frame = batch.to_pandas()
+            frame["Swing"] = frame[["Change_A", "Change_B"]].abs().max(axis=1)
+            frame = frame.nlargest(n, "Swing")
+            top = frame if top is None else pd.concat([top, frame]).nlargest(n, "Swing")
+        if top is None:
+            return pd.DataFrame(columns=SCHEMA.names + ["Swing"])
+        return top.reset_index(drop=True)
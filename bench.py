@@ -0,0 +1,210 @@
+"""
+Benchmark harness for the Fadzly battle simulation.
+
+Each (labs, mode) run executes in a fresh worker process so its peak RSS is its
+own. Stages are timed separately and the results are written as JSON, so
+regressions show up as a diff between two result files.
+"""
+import itertools
+import json
+import os
+import platform
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from battle_archive import BattleArchive
+from engine import (EFLM_BONUS, EFLM_TARGETS, K, MISSING_PENALTY, MONTHS, RATIO_BONUS, TIE_THRESHOLD,
+                    Checkpoints, calendar_order, leaderboard, penalize_missing,
+                    prepare_submissions, run_month, write_results)
+from ratings import START_RATING, RatingTable
+from rules import CURRENT
+from synthetic import generate_submissions
+
+DEFAULT_LABS = [10, 100, 1000, 5000]
+STAGES = ["penalty", "battles", "aggregation", "persistence"]
+
+
+# --- Reference implementation ---
+def reference_ratings(df, all_params=None, targets=EFLM_TARGETS):
+    """
+    Pure-Python, per-pair replay of the simulation, written like the original
+    dict-based loop. Used to check engine variants rating for rating.
+    """
+    df = prepare_submissions(df)
+    ratings = {}
+    labs = df["Lab"].unique().tolist()
+    params = list(all_params) if all_params is not None else df["Parameter"].unique().tolist()
+    levels = df["Level"].unique().tolist()
+    submitted = set(map(tuple, df[["Lab", "Parameter", "Level", "Month"]].to_numpy().tolist()))
+
+    for month in calendar_order(df["Month"].unique()):
+        for lab, param, level in itertools.product(labs, params, levels):
+            if (lab, param, level, month) not in submitted:
+                key = (lab, param, level)
+                ratings[key] = ratings.get(key, START_RATING) - MISSING_PENALTY
+
+        month_df = df[df["Month"] == month]
+        for (param, level), group in month_df.groupby(["Parameter", "Level"], observed=True):
+            rows = group[["Lab", "CV (%)", "Ratio"]].to_numpy().tolist()
+            for lab, _, _ in rows:
+                ratings.setdefault((lab, param, level), START_RATING)
+
+            for (labA, cvA, rA), (labB, cvB, rB) in itertools.combinations(rows, 2):
+                keyA, keyB = (labA, param, level), (labB, param, level)
+                penalty_A = MISSING_PENALTY if pd.isna(cvA) or pd.isna(rA) else 0
+                penalty_B = MISSING_PENALTY if pd.isna(cvB) or pd.isna(rB) else 0
+
+                if pd.isna(cvA) or pd.isna(cvB) or abs(cvA - cvB) < TIE_THRESHOLD:
+                    win_A = win_B = 0
+                elif cvA < cvB:
+                    win_A, win_B = 1, 0
+                else:
+                    win_A, win_B = 0, 1
+
+                bonus_A = RATIO_BONUS if not pd.isna(rA) and rA >= 1.0 else 0
+                bonus_B = RATIO_BONUS if not pd.isna(rB) and rB >= 1.0 else 0
+                if not pd.isna(cvA) and param in targets and cvA <= targets[param]:
+                    bonus_A += EFLM_BONUS
+                if not pd.isna(cvB) and param in targets and cvB <= targets[param]:
+                    bonus_B += EFLM_BONUS
+
+                Ra, Rb = ratings[keyA], ratings[keyB]
+                Ea = 1 / (1 + 10 ** ((Rb - Ra) / 400))
+                Eb = 1 / (1 + 10 ** ((Ra - Rb) / 400))
+                ratings[keyA] += K * (win_A - Ea)
+                ratings[keyB] += K * (win_B - Eb)
+                ratings[keyA] += bonus_A - penalty_A
+                ratings[keyB] += bonus_B - penalty_B
+    return ratings
+
+
+def _as_dict(frame):
+    return {(lab, param, level): elo for lab, param, level, elo in frame.itertuples(index=False)}
+
+
+# --- Timed run ---
+@contextmanager
+def _stage(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def run_once(labs, mode, params, months, missing_rate, nan_rate, seed, log_max_labs, verify_max_labs):
+    """One benchmark run; meant to execute in its own worker process."""
+    df = prepare_submissions(generate_submissions(
+        labs, parameters=params, months=MONTHS[:months], missing_rate=missing_rate, nan_rate=nan_rate, seed=seed
+    ))
+    keep_log = labs <= log_max_labs
+    timings = {}
+    ratings = RatingTable()
+    checkpoints = Checkpoints()
+    pairs = 0
+    groups = 0
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        archive = BattleArchive(os.path.join(out_dir, "battles"))
+        for month, month_df in sorted(df.groupby("Month", observed=True), key=lambda item: MONTHS.index(item[0])):
+            with _stage(timings, "penalty"):
+                penalize_missing(ratings, df, months=[month])
+
+            sizes = month_df.groupby(["Parameter", "Level"], observed=True).size().to_numpy()
+            groups += len(sizes)
+            pairs += int((sizes * (sizes - 1) // 2).sum())
+
+            with _stage(timings, "battles"):
+                if keep_log:
+                    with archive.month_writer(month) as writer:
+                        progression, _ = run_month(ratings, month_df, month, CURRENT, mode, writer.write)
+                else:
+                    progression, _ = run_month(ratings, month_df, month, CURRENT, mode, keep_log=False)
+            checkpoints.record(month, "", ratings, progression)
+
+        with _stage(timings, "aggregation"):
+            leaderboard(ratings, breakdown=True)
+
+        with _stage(timings, "persistence"):
+            write_results(checkpoints, out_dir)
+
+    ratings_frame = ratings.to_frame()
+    matches_reference = None
+    if mode == "sequential" and labs <= verify_max_labs:
+        matches_reference = _as_dict(ratings_frame) == reference_ratings(df)
+
+    return {
+        "labs": labs,
+        "mode": mode,
+        "rows": len(df),
+        "groups": groups,
+        "pairs": pairs,
+        "battle_log_written": keep_log,
+        "stages": {name: round(timings.get(name, 0.0), 6) for name in STAGES},
+        "total_seconds": round(sum(timings.values()), 6),
+        "pairs_per_sec": round(pairs / timings["battles"], 1) if timings.get("battles") else None,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "matches_reference": matches_reference,
+        "ratings": ratings_frame,
+    }
+
+
+def run_benchmark(labs=DEFAULT_LABS, modes=("sequential", "simultaneous"), params=3, months=2,
+                  missing_rate=0.05, nan_rate=0.02, seed=0, sequential_max_labs=1000,
+                  log_max_labs=1000, verify_max_labs=100, out="bench_results.json"):
+    """
+    Time every (labs, mode) combination and write the results to ``out``.
+
+    Sequential replay is skipped above ``sequential_max_labs``, battle logs are
+    only built up to ``log_max_labs``, and the pure-Python reference check only
+    runs up to ``verify_max_labs``. Simultaneous runs report their largest
+    rating difference from the sequential run of the same size.
+    """
+    runs = []
+    for n_labs in labs:
+        by_mode = {}
+        for mode in modes:
+            if mode == "sequential" and n_labs > sequential_max_labs:
+                continue
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                run = pool.submit(run_once, n_labs, mode, params, months, missing_rate, nan_rate,
+                                  seed, log_max_labs, verify_max_labs).result()
+            by_mode[mode] = run
+            runs.append(run)
+            print(f"{n_labs:>6} labs  {mode:<12}  {run['total_seconds']:>9.3f}s  "
+                  f"{run['pairs']:>12,} pairs  {run['peak_rss_mb']:>8.1f} MB")
+
+        if "sequential" in by_mode:
+            baseline = _as_dict(by_mode["sequential"]["ratings"])
+            for run in by_mode.values():
+                other = _as_dict(run["ratings"])
+                run["max_abs_diff_vs_sequential"] = max(
+                    (abs(other[key] - elo) for key, elo in baseline.items()), default=0.0
+                )
+
+    for run in runs:
+        del run["ratings"]
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "config": {
+            "labs": list(labs), "modes": list(modes), "params": params, "months": months,
+            "missing_rate": missing_rate, "nan_rate": nan_rate, "seed": seed,
+            "sequential_max_labs": sequential_max_labs, "log_max_labs": log_max_labs,
+            "verify_max_labs": verify_max_labs,
+        },
+        "runs": runs,
+    }
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
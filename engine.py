@@ -0,0 +1,715 @@
+import hashlib
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+import perf
+from ratings import RatingTable
+from rules import CURRENT, CompiledRules, canonical_parameter, canonicalize, to_json
+
+# --- Battle constants (the current ruleset; see rules.py) ---
+K = CURRENT.k
+TIE_THRESHOLD = CURRENT.tie_threshold
+RATIO_BONUS = CURRENT.ratio_bonus
+EFLM_BONUS = CURRENT.eflm_bonus
+MISSING_PENALTY = CURRENT.missing_penalty
+
+MODES = ("sequential", "simultaneous")
+
+# Process count for sharded simulations; 1 runs everything in-process
+SIM_WORKERS = int(os.environ.get("LLKK_WORKERS", "1"))
+
+# --- EFLM Targets ---
+EFLM_TARGETS = CURRENT.eflm_targets
+
+# ✅ Full expected parameters (LLKK fixed list) used by the penalty variant
+LLKK_PARAMETERS = list(CURRENT.expected_parameters)
+
+# --- Result files ---
+RESULTS_DB_FILE = "llkk.db"
+# Pre-database CSV dumps, imported once into a new results database
+ELO_HISTORY_FILE = "elo_history.csv"
+ELO_PROGRESSION_FILE = "elo_progression.csv"
+
+# Rows per battle frame handed to a run_month log sink
+LOG_CHUNK_ROWS = 50_000
+
+MEDALS = ["\U0001F947", "\U0001F948", "\U0001F949"]
+
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def calendar_order(months):
+    """Sort month names Jan..Dec; anything unrecognised goes last, alphabetically."""
+    rank = {month: i for i, month in enumerate(MONTHS)}
+    return sorted(set(months), key=lambda month: (rank.get(month, len(MONTHS)), str(month)))
+
+
+def presence_cube(df, all_params=None):
+    """
+    Boolean ``lab x parameter x level x month`` cube of the cells submitted in ``df``.
+
+    Expected cells are every lab x parameter x level x month seen in ``df``;
+    pass ``all_params`` to expect a fixed parameter list instead. Returns
+    ``(axes, present)`` where ``axes`` holds the four name indexes.
+    """
+    lab_idx, labs = pd.factorize(df["Lab"])
+    level_idx, levels = pd.factorize(df["Level"])
+    month_idx, months = pd.factorize(df["Month"])
+    if all_params is None:
+        param_idx, params = pd.factorize(df["Parameter"])
+    else:
+        params = pd.Index(all_params)
+        param_idx = params.get_indexer(df["Parameter"])
+
+    seen = (lab_idx >= 0) & (param_idx >= 0) & (level_idx >= 0) & (month_idx >= 0)
+    present = np.zeros((len(labs), len(params), len(levels), len(months)), dtype=bool)
+    present[lab_idx[seen], param_idx[seen], level_idx[seen], month_idx[seen]] = True
+    return (labs, params, levels, months), present
+
+
+def penalize_missing(ratings, df, all_params=None, months=None, ruleset=None):
+    """
+    Take the ruleset's missing penalty off every (Lab, Parameter, Level) once
+    per month it has no submission in ``df``, visiting only the holes of the
+    presence cube.
+
+    ``months`` restricts the penalty to those month names; by default every
+    month in ``df`` is charged.
+    """
+    missing_penalty = (ruleset or CURRENT).missing_penalty
+    axes, present = presence_cube(df, all_params)
+    labs, params, levels, all_months = axes
+    if months is None:
+        month_idx = range(len(all_months))
+    else:
+        month_idx = [m for m in all_months.get_indexer(list(months)) if m >= 0]
+
+    missing = ~present[..., list(month_idx)]
+    # C order walks lab, parameter, level like itertools.product did
+    kl, kp, kv = np.nonzero(missing.any(axis=3))
+    if not len(kl):
+        return
+
+    lab_codes = _table_codes(ratings, 0, labs, kl)
+    param_codes = _table_codes(ratings, 1, params, kp)
+    level_codes = _table_codes(ratings, 2, levels, kv)
+    ratings.ensure_cells(lab_codes, param_codes, level_codes)
+
+    # One pass per month keeps the repeated -10 steps identical to the old loop
+    for m in range(missing.shape[3]):
+        hole = missing[kl, kp, kv, m]
+        ratings.elo[lab_codes[hole], param_codes[hole], level_codes[hole]] -= missing_penalty
+
+
+def _table_codes(ratings, axis, names, idx):
+    used = np.unique(idx)
+    lookup = np.full(len(names), -1, dtype=np.intp)
+    lookup[used] = ratings.axis_codes(axis, np.asarray(names, dtype=object)[used])
+    return lookup[idx]
+
+
+def score_labs(cv, ratio, target=None, ruleset=None):
+    """
+    Per-row bonus and penalty for one (Parameter, Level, Month) group.
+    ``target`` is the EFLM CV target; ``None`` or NaN means there is none.
+    """
+    ruleset = ruleset or CURRENT
+    cv_nan = np.isnan(cv)
+    ratio_nan = np.isnan(ratio)
+
+    penalty = np.where(cv_nan | ratio_nan, ruleset.missing_penalty, 0)
+    bonus = np.where(~ratio_nan & (ratio >= 1.0), ruleset.ratio_bonus, 0)
+    if target is not None:
+        with np.errstate(invalid="ignore"):
+            bonus = bonus + np.where(~cv_nan & (cv <= target), ruleset.eflm_bonus, 0)
+    return bonus, penalty
+
+
+def win_matrix(cv, tie_threshold=TIE_THRESHOLD):
+    """W[i, j] is 1.0 when row i beats row j on CV, 0.0 on a loss or a tie."""
+    diff = cv[:, None] - cv[None, :]
+    with np.errstate(invalid="ignore"):
+        decisive = ~np.isnan(diff) & (np.abs(diff) >= tie_threshold)
+        return (decisive & (diff < 0)).astype(float)
+
+
+GroupBattles = namedtuple("GroupBattles", [
+    "idx_a", "idx_b", "bonus", "penalty", "updated_a", "updated_b", "change_a", "change_b"
+])
+
+
+def battle_group(ratings, slots, cv, ratio, target=None, mode="sequential", ruleset=None):
+    """
+    Run every pairwise battle of one group against ``ratings``.
+
+    ``slots[i]`` is the index into ``ratings`` of the lab on row ``i``, so a lab
+    that submitted twice shares one rating exactly like the old dict keys did.
+    ``ratings`` is updated in place. Scoring follows ``ruleset`` (the current
+    one by default).
+
+    ``mode="sequential"`` replays the pairs in ``itertools.combinations`` order
+    and reproduces the original loop bit for bit. ``mode="simultaneous"`` scores
+    every pair against the ratings at the start of the group and applies the
+    summed deltas in one step.
+
+    Returns a ``GroupBattles``: the row indices of each pair, the per-row
+    bonus/penalty, both ratings after each battle and the change each battle
+    made to them.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown battle mode: {mode!r}")
+
+    ruleset = ruleset or CURRENT
+    cv = np.asarray(cv, dtype=float)
+    ratio = np.asarray(ratio, dtype=float)
+    slots = np.asarray(slots, dtype=np.intp)
+    n = len(cv)
+
+    bonus, penalty = score_labs(cv, ratio, target, ruleset)
+    idx_a, idx_b = np.triu_indices(n, 1)
+    if n < 2:
+        empty = np.empty(0)
+        return GroupBattles(idx_a, idx_b, bonus, penalty, empty, empty, empty, empty)
+
+    wins = win_matrix(cv, ruleset.tie_threshold)
+    update = _replay_sequential if mode == "sequential" else _update_simultaneous
+    return GroupBattles(idx_a, idx_b, bonus, penalty,
+                        *update(ratings, slots, wins, bonus - penalty, idx_a, idx_b, ruleset.k))
+
+
+def _replay_sequential(ratings, slots, wins, adjust, idx_a, idx_b, k):
+    # Plain floats keep the arithmetic identical to the per-pair dict loop
+    r = [float(x) for x in ratings]
+    slot = slots.tolist()
+    adj = adjust.tolist()
+    w = wins.tolist()
+    updated_a = np.empty(len(idx_a))
+    updated_b = np.empty(len(idx_a))
+    change_a = np.empty(len(idx_a))
+    change_b = np.empty(len(idx_a))
+
+    for p, (i, j) in enumerate(zip(idx_a.tolist(), idx_b.tolist())):
+        si, sj = slot[i], slot[j]
+        Ra, Rb = r[si], r[sj]
+        Ea = 1 / (1 + 10 ** ((Rb - Ra) / 400))
+        Eb = 1 / (1 + 10 ** ((Ra - Rb) / 400))
+
+        r[si] += k * (w[i][j] - Ea)
+        r[sj] += k * (w[j][i] - Eb)
+
+        r[si] += adj[i]
+        r[sj] += adj[j]
+
+        updated_a[p] = r[si]
+        updated_b[p] = r[sj]
+        change_a[p] = r[si] - Ra
+        change_b[p] = r[sj] - Rb
+
+    ratings[:] = r
+    return updated_a, updated_b, change_a, change_b
+
+
+def _update_simultaneous(ratings, slots, wins, adjust, idx_a, idx_b, k):
+    start = np.asarray(ratings, dtype=float)[slots]
+    expected = 1 / (1 + 10 ** ((start[None, :] - start[:, None]) / 400))
+    delta = k * (wins - expected)
+    np.fill_diagonal(delta, 0.0)
+
+    n = len(slots)
+    row_delta = delta.sum(axis=1) + (n - 1) * adjust
+    np.add.at(ratings, slots, row_delta)
+
+    final = np.asarray(ratings, dtype=float)
+    return (final[slots[idx_a]], final[slots[idx_b]],
+            delta[idx_a, idx_b] + adjust[idx_a], delta[idx_b, idx_a] + adjust[idx_b])
+
+
+# --- Simulation outputs ---
+def _code_dtype(n):
+    """The integer dtype pandas uses for the codes of ``n`` categories, so wrapping them never copies."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _categorical(codes, categories):
+    return pd.Categorical.from_codes(codes, categories=categories, validate=False)
+
+
+class MonthOutputs:
+    """
+    One month's progression and battle log as preallocated typed arrays.
+
+    Both are sized from the group sizes before any battle runs: at most ``n``
+    progression rows and exactly ``n(n-1)/2`` battles per group of ``n``
+    rows. Names are integer codes into the month's labs, parameters and
+    levels. Ratings and changes in the battle log are float32. The values
+    were already rounded to 1-2 decimals, so this loses nothing.
+    ``progression()`` and ``flush_battles()`` wrap the arrays as DataFrames
+    with categorical name columns, without copying them.
+
+    With ``capacity`` the battle arrays hold only that many rows (or the
+    largest group) and are reused after each ``flush_battles()``.
+    """
+
+    BATTLE_DTYPES = {
+        "CV_A": np.float64, "CV_B": np.float64, "Ratio_A": np.float64, "Ratio_B": np.float64,
+        "Bonus_A": np.int16, "Penalty_A": np.int16, "Bonus_B": np.int16, "Penalty_B": np.int16,
+        "Updated_Rating_A": np.float32, "Updated_Rating_B": np.float32,
+        "Change_A": np.float32, "Change_B": np.float32,
+    }
+
+    def __init__(self, month, labs, keys, sizes, keep_log=True, capacity=None):
+        self.month = pd.Index([month])
+        self.labs = pd.Index(labs)
+        self.params = pd.Index(pd.unique(np.asarray([param for param, _ in keys], dtype=object)))
+        self.levels = pd.Index(pd.unique(np.asarray([level for _, level in keys], dtype=object)))
+        self.group_params = self.params.get_indexer([param for param, _ in keys]).astype(
+            _code_dtype(len(self.params)))
+        self.group_levels = self.levels.get_indexer([level for _, level in keys]).astype(
+            _code_dtype(len(self.levels)))
+        sizes = np.asarray(sizes, dtype=np.int64)
+        lab_dtype = _code_dtype(len(self.labs))
+
+        # A lab listed twice in a group still gets one progression row, so this is an upper bound
+        self._rows = 0
+        self._lab = np.empty(sizes.sum(), dtype=lab_dtype)
+        self._param = np.empty(sizes.sum(), dtype=self.group_params.dtype)
+        self._level = np.empty(sizes.sum(), dtype=self.group_levels.dtype)
+        self._elo = np.empty(sizes.sum())
+
+        self.pairs = sizes * (sizes - 1) // 2 if keep_log else np.zeros_like(sizes)
+        size = int(self.pairs.sum())
+        if capacity is not None:
+            size = min(size, max(capacity, int(self.pairs.max(initial=0))))
+        self._battle_rows = 0
+        self._battles = {"Lab_A": np.empty(size, dtype=lab_dtype), "Lab_B": np.empty(size, dtype=lab_dtype),
+                         "Parameter": np.empty(size, dtype=self.group_params.dtype),
+                         "Level": np.empty(size, dtype=self.group_levels.dtype)}
+        self._battles.update({name: np.empty(size, dtype=dtype) for name, dtype in self.BATTLE_DTYPES.items()})
+
+    @property
+    def pending_battles(self):
+        return self._battle_rows
+
+    def battle_room(self):
+        """Battle rows left before the next ``flush_battles()``."""
+        return len(self._battles["Lab_A"]) - self._battle_rows
+
+    def add_progression(self, g, lab_codes, elo):
+        """Ratings after group ``g`` for the labs ``lab_codes`` (codes into ``labs``)."""
+        rows = slice(self._rows, self._rows + len(lab_codes))
+        self._lab[rows] = lab_codes
+        self._param[rows] = self.group_params[g]
+        self._level[rows] = self.group_levels[g]
+        self._elo[rows] = np.round(elo, 2)
+        self._rows = rows.stop
+
+    def add_battles(self, g, row_codes, cv, ratio, battles):
+        """Group ``g``'s ``GroupBattles``; ``row_codes`` are the lab codes of its rows."""
+        rows = slice(self._battle_rows, self._battle_rows + len(battles.idx_a))
+        a, b = battles.idx_a, battles.idx_b
+        columns = self._battles
+        columns["Lab_A"][rows] = row_codes[a]
+        columns["Lab_B"][rows] = row_codes[b]
+        columns["Parameter"][rows] = self.group_params[g]
+        columns["Level"][rows] = self.group_levels[g]
+        columns["CV_A"][rows], columns["CV_B"][rows] = cv[a], cv[b]
+        columns["Ratio_A"][rows], columns["Ratio_B"][rows] = ratio[a], ratio[b]
+        columns["Bonus_A"][rows], columns["Penalty_A"][rows] = battles.bonus[a], battles.penalty[a]
+        columns["Bonus_B"][rows], columns["Penalty_B"][rows] = battles.bonus[b], battles.penalty[b]
+        columns["Updated_Rating_A"][rows] = np.round(battles.updated_a, 1)
+        columns["Updated_Rating_B"][rows] = np.round(battles.updated_b, 1)
+        columns["Change_A"][rows] = np.round(battles.change_a, 2)
+        columns["Change_B"][rows] = np.round(battles.change_b, 2)
+        self._battle_rows = rows.stop
+
+    def progression(self):
+        rows = self._rows
+        return pd.DataFrame({
+            "Lab": _categorical(self._lab[:rows], self.labs),
+            "Parameter": _categorical(self._param[:rows], self.params),
+            "Level": _categorical(self._level[:rows], self.levels),
+            "Month": _categorical(np.zeros(rows, dtype=np.int8), self.month),
+            "Elo": self._elo[:rows],
+        }, copy=False)
+
+    def flush_battles(self):
+        """The battles added since the last flush; with a ``capacity`` their rows are then reused."""
+        rows = self._battle_rows
+        columns = {name: values[:rows] for name, values in self._battles.items()}
+        self._battle_rows = 0
+        frame = {
+            "Lab_A": _categorical(columns["Lab_A"], self.labs),
+            "Lab_B": _categorical(columns["Lab_B"], self.labs),
+            "Parameter": _categorical(columns["Parameter"], self.params),
+            "Level": _categorical(columns["Level"], self.levels),
+            "Month": _categorical(np.zeros(rows, dtype=np.int8), self.month),
+        }
+        frame.update((name, columns[name]) for name in self.BATTLE_DTYPES)
+        return pd.DataFrame(frame, copy=False)
+
+
+def concat_frames(frames):
+    """
+    ``pd.concat`` for output frames: categorical columns stay categorical
+    (with the union of their categories) instead of falling back to object.
+    """
+    frames = [frame for frame in frames if len(frame)] or [frame for frame in frames if len(frame.columns)][:1]
+    if not frames:
+        return pd.DataFrame()
+    columns = {}
+    for name in frames[0].columns:
+        parts = [frame[name] for frame in frames]
+        dtypes = {part.dtype.categories.dtype if isinstance(part.dtype, pd.CategoricalDtype) else None
+                  for part in parts}
+        if None in dtypes or len(dtypes) > 1:
+            columns[name] = pd.concat(parts, ignore_index=True)
+        else:
+            columns[name] = union_categoricals(parts)
+    return pd.DataFrame(columns, copy=False)
+
+
+# --- Leaderboard ---
+def leaderboard(ratings, breakdown=False):
+    """
+    Per-lab Final Elo (mean), Total Score (sum) and rating count in one
+    reduction over the rating table, sorted with medals for the top three.
+
+    With ``breakdown=True`` also returns a long (Lab, Parameter, Level) frame of
+    each rating and its rank among the labs rated for that Parameter/Level.
+    """
+    used = ratings.used()
+    present = ratings.present[used]
+    elo = np.where(present, ratings.elo[used], 0.0)
+
+    totals = elo.sum(axis=(1, 2))
+    counts = present.sum(axis=(1, 2))
+    rated = np.flatnonzero(counts)
+    final = totals[rated] / counts[rated]
+    order = rated[np.argsort(-final, kind="stable")]
+
+    medals = np.full(len(order), "", dtype=object)
+    medals[:len(MEDALS)] = MEDALS[:len(order)]
+    summary = pd.DataFrame({
+        "Lab": np.asarray(ratings.labs, dtype=object)[order],
+        "Final Elo": np.round(totals[order] / counts[order], 2),
+        "Total Score": np.round(totals[order], 2),
+        "Ratings": counts[order],
+        "Medal": medals
+    })
+    if not breakdown:
+        return summary
+
+    # Rank labs within each (Parameter, Level): unrated cells sort last
+    keyed = np.where(present, -elo, np.inf)
+    ranks = np.empty(keyed.shape, dtype=np.int64)
+    np.put_along_axis(ranks, np.argsort(keyed, axis=0, kind="stable"),
+                      np.arange(1, keyed.shape[0] + 1)[:, None, None], axis=0)
+    lab_codes, p, l = np.nonzero(present)
+    detail = pd.DataFrame({
+        "Lab": np.asarray(ratings.labs, dtype=object)[lab_codes],
+        "Parameter": np.asarray(ratings.params, dtype=object)[p],
+        "Level": np.asarray(ratings.levels, dtype=object)[l],
+        "Elo": np.round(elo[lab_codes, p, l], 2),
+        "Rank": ranks[lab_codes, p, l]
+    }).sort_values(["Parameter", "Level", "Rank"], kind="stable", ignore_index=True)
+    return summary, detail
+
+
+# --- Month-by-month simulation with checkpoints ---
+def run_month(ratings, month_df, month, ruleset=None, mode="sequential", log_sink=None, keep_log=True,
+              progress=None):
+    """
+    Battle every (Parameter, Level) group of one month against ``ratings``
+    under ``ruleset`` (the current one by default).
+
+    Returns ``(progression, battle_logs)``: a frame with one row per lab and
+    group, and a list holding the month's battle frame (both built on
+    ``MonthOutputs``). When ``log_sink`` is given the battles are handed to it
+    instead, in frames of up to ``LOG_CHUNK_ROWS`` over a reused buffer, and
+    ``battle_logs`` stays empty. ``keep_log=False`` skips the battle log.
+
+    ``progress(done)`` is called after each group with the number of groups
+    done so far; an exception it raises aborts the month.
+    """
+    ruleset = ruleset or CURRENT
+    groups = month_df.groupby(["Parameter", "Level"], observed=True)
+    sizes = groups.size()
+    month_labs = pd.Index(pd.unique(month_df["Lab"].to_numpy()))
+    # Streamed logs reuse one chunk-sized buffer instead of holding the whole month
+    outputs = MonthOutputs(month, month_labs, sizes.index, sizes.to_numpy(), keep_log,
+                           capacity=None if log_sink is None else LOG_CHUNK_ROWS)
+    # EFLM target of every group in one lookup by parameter code
+    group_targets = CompiledRules(ruleset, outputs.params).eflm_targets[outputs.group_params]
+
+    for g, ((param, level), group) in enumerate(groups):
+        row_codes = month_labs.get_indexer(group["Lab"].to_numpy())
+        group_codes = pd.unique(row_codes)
+        lab_codes, p, l = ratings.ensure(month_labs[group_codes].tolist(), param, level)
+
+        cv = group["CV (%)"].to_numpy(dtype=float)
+        ratio = group["Ratio"].to_numpy(dtype=float)
+        slots = pd.Index(group_codes).get_indexer(row_codes)
+        group_ratings = ratings.elo[lab_codes, p, l]
+
+        battles = battle_group(group_ratings, slots, cv, ratio, group_targets[g], mode=mode, ruleset=ruleset)
+        ratings.elo[lab_codes, p, l] = group_ratings
+
+        if keep_log:
+            if log_sink is not None and outputs.battle_room() < outputs.pairs[g]:
+                log_sink(outputs.flush_battles())
+            outputs.add_battles(g, row_codes, cv, ratio, battles)
+        outputs.add_progression(g, group_codes, group_ratings)
+        if progress is not None:
+            progress(g + 1)
+
+    battle_logs = []
+    if keep_log and outputs.pairs.sum():
+        if log_sink is None:
+            battle_logs.append(outputs.flush_battles())
+        elif outputs.pending_battles:
+            log_sink(outputs.flush_battles())
+    return outputs.progression(), battle_logs
+
+
+def month_fingerprint(month_df):
+    """Stable hash of one month's submissions, row order included (it sets the pair order)."""
+    cols = ["Lab", "Parameter", "Level", "CV (%)", "Ratio"]
+    hashed = pd.util.hash_pandas_object(month_df[cols], index=False)
+    return hashlib.sha1(hashed.to_numpy().tobytes()).hexdigest()
+
+
+def universe_of(df, all_params=None):
+    """The lab/parameter/level sets that decide which cells the penalty expects."""
+    params = all_params if all_params is not None else df["Parameter"].unique()
+    return (
+        tuple(sorted(map(str, df["Lab"].unique()))),
+        tuple(sorted(map(str, params))),
+        tuple(sorted(map(str, df["Level"].unique())))
+    )
+
+
+class Checkpoints:
+    """
+    Ratings snapshotted after each calendar month of a simulation.
+
+    Each month also keeps the fingerprint of the submissions it was computed
+    from and its progression rows, so a rerun can resume from the month before
+    the earliest change instead of replaying the whole year.
+    """
+
+    def __init__(self):
+        self.signature = None
+        self.ruleset = None
+        self.months = []
+        self.fingerprints = {}
+        self.ratings = {}
+        self.progression = {}
+
+    def __len__(self):
+        return len(self.months)
+
+    def resume_index(self, months, fingerprints, signature):
+        """Index into ``months`` of the first month that must be recomputed."""
+        if signature != self.signature:
+            return 0
+        for i, month in enumerate(months):
+            if i >= len(self.months) or self.months[i] != month or self.fingerprints.get(month) != fingerprints[month]:
+                return i
+        return len(months)
+
+    def truncate(self, n):
+        for month in self.months[n:]:
+            for store in (self.fingerprints, self.ratings, self.progression):
+                store.pop(month, None)
+        self.months = self.months[:n]
+
+    def record(self, month, fingerprint, ratings, progression):
+        self.months.append(month)
+        self.fingerprints[month] = fingerprint
+        self.ratings[month] = ratings.copy()
+        self.progression[month] = pd.DataFrame(progression)
+
+    def latest(self):
+        return self.ratings[self.months[-1]] if self.months else None
+
+    def progression_frame(self):
+        return concat_frames([self.progression[month] for month in self.months])
+
+
+def plan_resume(df, checkpoints, all_params=None, ruleset=None, mode="sequential"):
+    """
+    Work out which months of ``df`` need recomputing and trim ``checkpoints`` to
+    the months that stay. Returns ``(months, by_month, fingerprints, start)``
+    with ``months`` in calendar order and ``months[start:]`` to be recomputed.
+    """
+    months = calendar_order(df["Month"].unique())
+    by_month = {month: month_df for month, month_df in df.groupby("Month", sort=False, observed=True)}
+    fingerprints = {month: month_fingerprint(by_month[month]) for month in months}
+    # A different lab/parameter/level universe or scoring setup invalidates every month
+    ruleset = ruleset or CURRENT
+    signature = (universe_of(df, all_params), mode, to_json(ruleset))
+
+    start = checkpoints.resume_index(months, fingerprints, signature)
+    checkpoints.truncate(start)
+    checkpoints.signature = signature
+    checkpoints.ruleset = ruleset
+    return months, by_month, fingerprints, start
+
+
+def simulate_incremental(df, checkpoints, all_params=None, ruleset=None, mode="sequential", archive=None,
+                         workers=1, progress=None):
+    """
+    Bring ``checkpoints`` up to date with ``df`` and return the final ratings.
+
+    Months run in calendar order. Each month first charges the missing-submission
+    penalty for that month, then battles its groups, then is snapshotted.
+    Months before the earliest changed one are reused as-is. With a
+    ``BattleArchive`` the battle log of each recomputed month is streamed to
+    disk instead of being returned. ``workers > 1`` shards the work by
+    (Parameter, Level) across a process pool with identical results.
+
+    ``progress(stage, done, total)`` is called as the ``"penalty"`` and
+    ``"battles"`` stages advance, after every (Parameter, Level) group when
+    running serially; an exception it raises aborts the run.
+
+    Returns ``(ratings, battle_logs, resumed_from)`` where ``battle_logs`` only
+    covers the recomputed months and ``resumed_from`` is the first of them
+    (``None`` when nothing changed).
+    """
+    with perf.stage("plan"):
+        months, by_month, fingerprints, start = plan_resume(df, checkpoints, all_params, ruleset, mode)
+    perf.count("months", len(months) - start)
+
+    # Also drops the battles of trailing months that left the submissions
+    if archive is not None:
+        archive.retain(months[:start])
+
+    if start == len(months):
+        latest = checkpoints.latest()
+        return (latest.copy() if latest is not None else RatingTable()), [], None
+
+    # Every pair of rows in a (Month, Parameter, Level) group battles once
+    sizes = df[df["Month"].isin(months[start:])].groupby(["Month", "Parameter", "Level"], observed=True).size()
+    perf.count("groups", len(sizes))
+    perf.count("pairs", (sizes * (sizes - 1) // 2).sum())
+
+    ratings = checkpoints.latest().copy() if start else RatingTable()
+    if workers > 1:
+        from parallel import run_sharded
+
+        # Penalties are charged inside the shards, so the whole pool counts as battles
+        with perf.stage("battles"):
+            ratings, battle_logs = run_sharded(df, ratings, checkpoints, months[start:], fingerprints,
+                                               all_params, ruleset, mode, archive, workers, progress)
+        return ratings, battle_logs, months[start]
+
+    groups = [by_month[month].groupby(["Parameter", "Level"], observed=True).ngroups for month in months[start:]]
+    total = sum(groups)
+    battle_logs = []
+    for i, month in enumerate(months[start:]):
+        if progress is not None:
+            progress("penalty", i, len(groups))
+        with perf.stage("penalty"):
+            penalize_missing(ratings, df, all_params, months=[month], ruleset=ruleset)
+        month_progress = None
+        if progress is not None:
+            progress("battles", sum(groups[:i]), total)
+
+            def month_progress(group_done, done=sum(groups[:i])):
+                progress("battles", done + group_done, total)
+        # Battle log writes to the archive are part of this stage
+        with perf.stage("battles"):
+            if archive is None:
+                progression, month_logs = run_month(ratings, by_month[month], month, ruleset, mode,
+                                                    progress=month_progress)
+                battle_logs.extend(month_logs)
+            else:
+                with archive.month_writer(month) as writer:
+                    progression, _ = run_month(ratings, by_month[month], month, ruleset, mode, writer.write,
+                                               progress=month_progress)
+        with perf.stage("checkpoint"):
+            checkpoints.record(month, fingerprints[month], ratings, progression)
+
+    if progress is not None:
+        progress("battles", total, total)
+    return ratings, battle_logs, months[start]
+
+
+# --- Headless entry point ---
+SimulationResult = namedtuple("SimulationResult", [
+    "ratings", "progression", "battle_log", "leaderboard", "rankings", "resumed_from", "ruleset"
+])
+
+
+def prepare_submissions(df, ruleset=None):
+    """
+    Spell parameters the way ``ruleset`` does, coerce CV/Ratio to numbers and
+    drop rows without n (QC) or Working Days.
+    """
+    df = df.copy()
+    df["Parameter"] = canonicalize(df["Parameter"], ruleset)
+    df["CV (%)"] = pd.to_numeric(df["CV (%)"], errors="coerce")
+    df["Ratio"] = pd.to_numeric(df["Ratio"], errors="coerce")
+    return df.dropna(subset=["n (QC)", "Working Days"])
+
+
+def simulate(df, checkpoints=None, all_params=None, ruleset=None, mode="sequential", archive=None,
+             workers=SIM_WORKERS, progress=None):
+    """
+    Run the Fadzly algorithm over a submissions DataFrame. No Streamlit, no files
+    (unless an ``archive`` is passed for the battle log).
+
+    ``ruleset`` (a ``rules.Ruleset``, the current one by default) sets the
+    scoring and how parameter names in ``df`` and ``all_params`` are spelled.
+    It becomes part of the checkpoints, so switching rulesets recomputes
+    every month.
+
+    ``checkpoints`` carries the prior ratings: it is brought up to date in place
+    and only months after the last unchanged one are replayed. ``workers``
+    processes share the (Parameter, Level) chains. ``progress(stage, done, total)``
+    reports the penalty, battle and aggregation stages. Returns a
+    ``SimulationResult``; ``battle_log`` is ``None`` when it went to ``archive``.
+    """
+    if checkpoints is None:
+        checkpoints = Checkpoints()
+    ruleset = ruleset or CURRENT
+    if all_params is not None:
+        all_params = list(dict.fromkeys(canonical_parameter(param, ruleset) for param in all_params))
+
+    with perf.stage("prepare"):
+        df = prepare_submissions(df, ruleset)
+    perf.count("rows", len(df))
+    ratings, battle_logs, resumed_from = simulate_incremental(
+        df, checkpoints, all_params, ruleset=ruleset, mode=mode, archive=archive, workers=workers, progress=progress
+    )
+    if progress is not None:
+        progress("aggregation", 0, 1)
+    with perf.stage("aggregation"):
+        summary, rankings = leaderboard(ratings, breakdown=True)
+        progression = checkpoints.progression_frame()
+
+    if archive is not None:
+        battle_log = None
+    else:
+        battle_log = concat_frames(battle_logs)
+
+    return SimulationResult(ratings, progression, battle_log, summary, rankings, resumed_from, ruleset)
+
+
+def write_results(checkpoints, out_dir="data"):
+    """
+    Persist the final ratings, monthly snapshots and progression of
+    ``checkpoints`` to the results database in ``out_dir``, the way the app
+    reloads them. Returns whether anything changed.
+    """
+    from results_db import ResultsDB
+
+    return ResultsDB(os.path.join(out_dir, RESULTS_DB_FILE)).save(checkpoints)
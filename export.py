@@ -0,0 +1,95 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from store import DATA_DIR
+
+EXPORTS_DIR = os.path.join(DATA_DIR, "exports")
+CHUNK_ROWS = 50_000
+# Excel's hard limit, header row included; longer sheets continue as "<name> (2)"
+EXCEL_MAX_ROWS = 1_048_576
+
+
+def results_version(stamps):
+    """Short hash of result-file fingerprints; any rewritten file gives a new version."""
+    return hashlib.sha1(repr(sorted(stamps)).encode()).hexdigest()[:16]
+
+
+def export_path(version, filename):
+    return os.path.join(EXPORTS_DIR, version, filename)
+
+
+def cached_export(version, filename, build):
+    """
+    Path of ``filename`` built for ``version``, calling ``build(path)`` only on
+    the first request. Exports of older versions are deleted when a new one is built.
+    """
+    path = export_path(version, filename)
+    if os.path.exists(path):
+        return path
+
+    version_dir = os.path.dirname(path)
+    os.makedirs(version_dir, exist_ok=True)
+    for name in os.listdir(EXPORTS_DIR):
+        if name != version:
+            shutil.rmtree(os.path.join(EXPORTS_DIR, name), ignore_errors=True)
+
+    # Build under a temporary name so a half-written file is never served
+    fd, tmp = tempfile.mkstemp(dir=version_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        build(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return path
+
+
+def _chunks(source, chunk_rows=CHUNK_ROWS):
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunk_rows):
+            yield source.iloc[start:start + chunk_rows]
+    else:
+        yield from source
+
+
+def write_workbook(path, sheets):
+    """
+    Write ``[(sheet_name, source), ...]`` to an .xlsx file, where each source is
+    a DataFrame or an iterable of same-column DataFrame chunks.
+
+    xlsxwriter runs in constant-memory mode, so rows go straight to disk and only
+    one chunk of a sheet is held at a time.
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    for name, source in sheets:
+        sheet, row, part = None, 0, 1
+        for chunk in _chunks(source):
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for record in values.itertuples(index=False, name=None):
+                if sheet is None or row == EXCEL_MAX_ROWS:
+                    sheet = workbook.add_worksheet(name if part == 1 else f"{name} ({part})")
+                    sheet.write_row(0, 0, [str(col) for col in chunk.columns])
+                    row, part = 1, part + 1
+                sheet.write_row(row, 0, record)
+                row += 1
+        if sheet is None:
+            sheet = workbook.add_worksheet(name)
+            if isinstance(source, pd.DataFrame):
+                sheet.write_row(0, 0, [str(col) for col in source.columns])
+    workbook.close()
+
+
+def write_csv(path, source):
+    """Write a DataFrame or an iterable of DataFrame chunks to one CSV file, chunk by chunk."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        header = True
+        for chunk in _chunks(source):
+            chunk.to_csv(f, index=False, header=header)
+            header = False
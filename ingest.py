@@ -0,0 +1,220 @@
+"""
+Bulk ingestion of monthly QC workbooks and CSV files into the submission store.
+
+Workbooks are read row by row with openpyxl's read-only mode. Headers are
+mapped onto the store columns, and every check runs as a whole-column
+operation. Rows that fail come back with their sheet, row number and reasons.
+"""
+import os
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from engine import MONTHS
+from rules import canonicalize
+from store import COLUMNS, KEY_COLUMNS, SubmissionStore
+
+# Same bounds as the Data Entry form
+CV_RANGE = (0.0, 100.0)
+N_QC_RANGE = (1, 100)
+WORKING_DAYS_RANGE = (1, 31)
+RATIO_TOLERANCE = 0.01
+
+SOURCE_COLUMNS = ["Sheet", "Row"]
+
+# Header with case, spaces and punctuation removed -> store column
+COLUMN_ALIASES = {
+    "lab": "Lab", "laboratory": "Lab", "labname": "Lab",
+    "parameter": "Parameter", "analyte": "Parameter", "test": "Parameter",
+    "level": "Level", "qclevel": "Level",
+    "month": "Month",
+    "cv": "CV (%)", "cvpercent": "CV (%)",
+    "n": "n (QC)", "nqc": "n (QC)", "qcn": "n (QC)",
+    "workingdays": "Working Days", "days": "Working Days", "wd": "Working Days",
+    "ratio": "Ratio",
+}
+VALUE_COLUMNS = ["CV (%)", "n (QC)", "Working Days", "Ratio"]
+
+IngestResult = namedtuple("IngestResult", ["accepted", "rejected"])
+
+
+def _empty():
+    return pd.DataFrame(columns=SOURCE_COLUMNS + COLUMNS)
+
+
+def _header_key(name):
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+def _month_key(value):
+    """``Jan``/``January``/``1``/dates -> ``Jan``; anything else -> ``None``."""
+    if isinstance(value, (pd.Timestamp, np.datetime64)) or hasattr(value, "strftime"):
+        return MONTHS[pd.Timestamp(value).month - 1]
+    text = str(value).strip()
+    if text.isdigit() and 1 <= int(text) <= len(MONTHS):
+        return MONTHS[int(text) - 1]
+    text = text[:3].title()
+    return text if text in MONTHS else None
+
+
+# --- Reading ---
+def read_workbook(source):
+    """Yield ``(sheet_name, frame)`` for every non-empty sheet, streaming rows in read-only mode."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                continue
+            columns = [f"Column {i + 1}" if name is None else str(name).strip() for i, name in enumerate(header)]
+            frame = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+            # Excel row numbers: the header is row 1
+            frame.index = frame.index + 2
+            yield sheet.title, frame.dropna(how="all")
+    finally:
+        workbook.close()
+
+
+def read_upload(source, name=None):
+    """
+    Read an .xlsx/.xlsm, .xls or .csv upload (a path or file object) into the
+    store's columns, plus the ``Sheet`` and ``Row`` each value came from.
+    """
+    name = name or getattr(source, "name", None) or str(source)
+    ext = os.path.splitext(name)[1].lower()
+    if ext == ".csv":
+        frame = pd.read_csv(source)
+        frame.index = frame.index + 2
+        sheets = [(os.path.basename(name), frame)]
+    elif ext == ".xls":
+        sheets = list(pd.read_excel(source, sheet_name=None).items())
+        for _, frame in sheets:
+            frame.index = frame.index + 2
+    else:
+        sheets = read_workbook(source)
+
+    frames = [map_columns(frame, sheet) for sheet, frame in sheets]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return _empty()
+    return pd.concat(frames, ignore_index=True)
+
+
+def map_columns(frame, sheet=""):
+    """
+    Rename ``frame``'s headers onto the store columns.
+
+    Long sheets carry a Month column. Wide sheets carry one ``<field>_<month>``
+    column per month (``CV_Mar``, ``Ratio_Mar``) and are unpivoted. A missing
+    Level is split off the Parameter (``Glu_L1``). Unrecognised columns are ignored.
+    """
+    fixed, by_month = {}, {}
+    for col in frame.columns:
+        key = _header_key(col)
+        if key in COLUMN_ALIASES:
+            fixed.setdefault(COLUMN_ALIASES[key], col)
+            continue
+        field, _, suffix = str(col).rpartition("_")
+        month = _month_key(suffix) if field else None
+        if month and _header_key(field) in COLUMN_ALIASES:
+            by_month.setdefault(month, {})[COLUMN_ALIASES[_header_key(field)]] = col
+
+    base = pd.DataFrame({target: frame[col] for target, col in fixed.items()}, index=frame.index)
+    if by_month and "Month" not in base:
+        parts = []
+        for month, cols in by_month.items():
+            part = base.copy()
+            part["Month"] = month
+            for target, col in cols.items():
+                part[target] = frame[col]
+            parts.append(part)
+        base = pd.concat(parts)
+
+    if "Level" not in base and "Parameter" in base:
+        split = base["Parameter"].astype(str).str.extract(r"^(.*?)[ _-]+(L\d+)$", flags=re.IGNORECASE)
+        has_level = split[0].notna()
+        base["Level"] = split[1].where(has_level)
+        base["Parameter"] = split[0].where(has_level, base["Parameter"])
+
+    base = base.reindex(columns=COLUMNS)
+    base.insert(0, "Row", base.index.to_numpy())
+    base.insert(0, "Sheet", sheet)
+    return base.reset_index(drop=True)
+
+
+# --- Validation ---
+def validate(df):
+    """
+    Split mapped rows into accepted store rows and a rejection report.
+
+    Keys are cleaned (canonical parameter names, ``Jan``-style months, ``L1``-style
+    levels), values must be numbers within the Data Entry bounds, and a given
+    Ratio must match ``n (QC) / Working Days``; a blank one is filled in. Later
+    repeats of a (Lab, Parameter, Level, Month) key are rejected.
+    """
+    df = df.reset_index(drop=True)
+    keys = {}
+    for col in ["Lab", "Parameter", "Level"]:
+        text = df[col].astype("string").str.strip()
+        keys[col] = text.mask(text == "")
+    keys["Parameter"] = canonicalize(keys["Parameter"])
+    level = keys["Level"].str.upper().str.replace(r"^(?:LEVEL|LVL|L)?\s*(\d+)$", r"L\1", regex=True)
+    keys["Level"] = level.where(level.str.fullmatch(r"L\d+", na=False))
+    keys["Month"] = pd.Series([None if pd.isna(m) else _month_key(m) for m in df["Month"]],
+                              index=df.index, dtype="string")
+
+    values = {col: pd.to_numeric(df[col], errors="coerce") for col in VALUE_COLUMNS}
+    cv, n_qc, days, ratio = (values[col] for col in VALUE_COLUMNS)
+    expected_ratio = (n_qc / days).round(2)
+
+    checks = {
+        "missing Lab": keys["Lab"].isna(),
+        "missing Parameter": keys["Parameter"].isna(),
+        "missing or invalid Level": keys["Level"].isna(),
+        "missing or invalid Month": keys["Month"].isna(),
+        "CV (%) missing": cv.isna(),
+        "CV (%) out of range": ~cv.isna() & ((cv <= CV_RANGE[0]) | (cv > CV_RANGE[1])),
+        "n (QC) missing": n_qc.isna(),
+        "n (QC) not a whole number in range": ~n_qc.isna() & (
+            (n_qc % 1 != 0) | (n_qc < N_QC_RANGE[0]) | (n_qc > N_QC_RANGE[1])),
+        "Working Days missing": days.isna(),
+        "Working Days not a whole number in range": ~days.isna() & (
+            (days % 1 != 0) | (days < WORKING_DAYS_RANGE[0]) | (days > WORKING_DAYS_RANGE[1])),
+        "Ratio does not match n (QC) / Working Days": ~ratio.isna() & ~expected_ratio.isna() & (
+            (ratio - expected_ratio).abs() > RATIO_TOLERANCE),
+    }
+    invalid = np.logical_or.reduce([mask.to_numpy(dtype=bool) for mask in checks.values()])
+
+    cleaned = pd.DataFrame({
+        **keys,
+        "CV (%)": cv, "n (QC)": n_qc, "Working Days": days,
+        "Ratio": expected_ratio,
+    })[COLUMNS]
+    # Only rows that are otherwise valid count as the first occurrence of their key
+    duplicate = np.zeros(len(df), dtype=bool)
+    duplicate[~invalid] = cleaned[~invalid].duplicated(KEY_COLUMNS).to_numpy()
+    checks["duplicate of an earlier row"] = pd.Series(duplicate, index=df.index)
+
+    reason = pd.Series("", index=df.index, dtype=object)
+    for text, mask in checks.items():
+        reason = reason.mask(mask.to_numpy(dtype=bool), reason + text + "; ")
+    rejected_rows = (reason != "").to_numpy()
+
+    accepted = cleaned[~rejected_rows].astype({col: object for col in KEY_COLUMNS}).reset_index(drop=True)
+    rejected = df[rejected_rows].assign(Reason=reason[rejected_rows].str.rstrip("; ")).reset_index(drop=True)
+    return IngestResult(accepted, rejected)
+
+
+def ingest(sources, store=None):
+    """Read, validate and append every file in ``sources`` to ``store``; returns the ``IngestResult``."""
+    store = store or SubmissionStore()
+    frames = [read_upload(source) for source in sources]
+    result = validate(pd.concat(frames, ignore_index=True) if frames else _empty())
+    if not result.accepted.empty:
+        store.append(result.accepted)
+    return result
@@ -0,0 +1,154 @@
+"""
+Background simulation jobs.
+
+A job runs on a daemon thread of the server process, so it keeps going when
+the admin navigates away. Only one job runs at a time. It resumes from the
+saved checkpoints, streams battles into a staging archive, and swaps its
+results in only once it has finished: the results database in one
+transaction, then the battle archive month by month. A cancelled or failed
+job leaves the published results untouched.
+"""
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+
+import perf
+from battle_archive import BATTLES_DIR, BattleArchive
+from engine import RESULTS_DB_FILE, simulate, write_results
+from results_db import ResultsDB
+from rules import get_ruleset
+from store import DATA_DIR
+
+STAGES = ("loading", "penalty", "battles", "aggregation", "persistence")
+STAGE_LABELS = {
+    "queued": "Waiting to start",
+    "loading": "Loading checkpoints",
+    "penalty": "Charging missing-submission penalties",
+    "battles": "Battling (Parameter, Level) groups",
+    "aggregation": "Ranking labs",
+    "persistence": "Saving results",
+}
+HISTORY_SIZE = 10
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobBusy(RuntimeError):
+    """Raised by ``JobRunner.submit`` while another job is still running."""
+
+
+class SimulationJob:
+    """State of one background simulation; updated by its thread, read by pages."""
+
+    def __init__(self, mode="sequential", all_params=None, profile=None, ruleset=None):
+        self.id = uuid.uuid4().hex[:8]
+        self.mode = mode
+        self.all_params = all_params
+        self.profile = profile
+        self.ruleset = get_ruleset() if ruleset is None else ruleset
+        self.status = "queued"
+        self.stage = "queued"
+        self.done = 0
+        self.total = 0
+        self.submitted = time.time()
+        self.finished = None
+        self.error = None
+        self.leaderboard = None
+        self.recomputed = []
+        self._cancel = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    @property
+    def fraction(self):
+        """Share of the current stage that is done, for a progress bar."""
+        return self.done / self.total if self.total else 0.0
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.submitted
+
+    def cancel(self):
+        self._cancel.set()
+
+    def report(self, stage, done, total):
+        """``progress`` callback for ``simulate``; raises once a cancel was requested."""
+        if self._cancel.is_set() and stage != "persistence":
+            raise JobCancelled()
+        self.stage, self.done, self.total = stage, done, total
+
+
+class JobRunner:
+    """Runs at most one ``SimulationJob`` at a time and remembers the last few."""
+
+    def __init__(self, data_dir=DATA_DIR, battles_dir=BATTLES_DIR):
+        self.data_dir = data_dir
+        self.battles_dir = battles_dir
+        self.history = deque(maxlen=HISTORY_SIZE)
+        self._lock = threading.Lock()
+
+    @property
+    def latest(self):
+        return self.history[0] if self.history else None
+
+    def submit(self, df, mode="sequential", all_params=None, profile=False, ruleset=None):
+        """
+        Start a job for the submissions ``df`` under ``ruleset`` (the current
+        one by default) and return it. ``profile=True`` also writes a cProfile
+        of the job to ``<PERF_DIR>/simulation-<id>.prof``.
+        """
+        with self._lock:
+            if self.latest is not None and self.latest.active:
+                raise JobBusy(f"Simulation job {self.latest.id} is still running.")
+            job = SimulationJob(mode, all_params, ruleset=ruleset)
+            if profile:
+                job.profile = os.path.join(perf.PERF_DIR, f"simulation-{job.id}.prof")
+            self.history.appendleft(job)
+        threading.Thread(target=self._run, args=(job, df), name=f"simulation-{job.id}", daemon=True).start()
+        return job
+
+    def _run(self, job, df):
+        job.status = "running"
+        staging = BattleArchive(self.battles_dir + ".staging")
+        status = "failed"
+        try:
+            with perf.measure("simulation", profile=job.profile, job=job.id, mode=job.mode,
+                              ruleset=job.ruleset.version):
+                job.report("loading", 0, 1)
+                # A private copy: the published checkpoints only change when the job saves
+                with perf.stage("loading"):
+                    checkpoints = ResultsDB(os.path.join(self.data_dir, RESULTS_DB_FILE)).load_checkpoints()
+                shutil.rmtree(staging.root, ignore_errors=True)
+
+                result = simulate(df, checkpoints, job.all_params, job.ruleset, mode=job.mode, archive=staging,
+                                  progress=job.report)
+
+                job.report("persistence", 0, 1)
+                with perf.stage("persistence"):
+                    write_results(checkpoints, self.data_dir)
+                    if result.resumed_from is not None:
+                        start = checkpoints.months.index(result.resumed_from)
+                        BattleArchive(self.battles_dir).publish(staging, checkpoints.months[:start])
+                        job.recomputed = checkpoints.months[start:]
+                    else:
+                        # Nothing recomputed, but months that left the submissions still go
+                        BattleArchive(self.battles_dir).retain(checkpoints.months)
+                job.report("persistence", 1, 1)
+            job.leaderboard = result.leaderboard
+            status = "done"
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as exc:
+            job.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            # The job only stops being active once its staging files are gone
+            shutil.rmtree(staging.root, ignore_errors=True)
+            job.finished = time.time()
+            job.status = status
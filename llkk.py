@@ -0,0 +1,235 @@
+"""
+Headless LLKK commands, for batch jobs that should not start a Streamlit server.
+
+    python -m llkk ingest March_2025.xlsx --rejects rejected.csv
+    python -m llkk simulate --input data/submissions --out results/ --profile results/simulate.prof
+    python -m llkk simulate --input data/submissions --out results-2025.1/ --ruleset 2025.1
+    python -m llkk generate --labs 100 --out synthetic.csv
+    python -m llkk bench --labs 10 100 1000 --out bench_results.json
+    python -m llkk sweep --input data/submissions --k 8 16 32 --tie-threshold 0.05 0.1 0.2 --out sweep
+    python -m llkk assets
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+import perf
+from battle_archive import BattleArchive
+from engine import EFLM_TARGETS, MODES, MONTHS, RESULTS_DB_FILE, SIM_WORKERS, Checkpoints, simulate, write_results
+from results_db import ResultsDB
+from rules import CURRENT, RULESETS, get_ruleset
+from store import SUBMISSIONS_DIR, SubmissionStore
+
+
+def read_submissions(paths):
+    """Read submission store directories and/or CSV, Parquet or Excel files into one frame."""
+    frames = []
+    for path in paths:
+        ext = os.path.splitext(path)[1].lower()
+        if os.path.isdir(path):
+            frames.append(SubmissionStore(path).scan())
+        elif ext == ".csv":
+            frames.append(pd.read_csv(path))
+        elif ext == ".parquet":
+            frames.append(pd.read_parquet(path))
+        elif ext in (".xlsx", ".xls"):
+            frames.append(pd.read_excel(path))
+        else:
+            raise SystemExit(f"Unsupported input: {path}")
+    if not frames:
+        return pd.DataFrame()
+    # Categoricals from different stores would not line up, so concat as plain values
+    return pd.concat([frame.astype({col: object for col in frame.select_dtypes("category")}) for frame in frames],
+                     ignore_index=True)
+
+
+def cmd_simulate(args):
+    os.makedirs(args.out, exist_ok=True)
+    log = os.path.join(args.out, "perf", "metrics.jsonl")
+    ruleset = get_ruleset(args.ruleset)
+    with perf.measure("simulation", log=log, profile=args.profile, mode=args.mode, workers=args.workers,
+                      ruleset=ruleset.version) as run:
+        with perf.stage("loading"):
+            df = read_submissions(args.input)
+            if df.empty:
+                print("No submissions found.", file=sys.stderr)
+                return 1
+            db = ResultsDB(os.path.join(args.out, RESULTS_DB_FILE))
+            checkpoints = Checkpoints() if args.full else db.load_checkpoints()
+
+        archive = BattleArchive(os.path.join(args.out, "battles"))
+        all_params = ruleset.expected_parameters if args.fixed_params else None
+        result = simulate(df, checkpoints, all_params, ruleset, mode=args.mode, archive=archive,
+                          workers=args.workers)
+
+        with perf.stage("persistence"):
+            write_results(checkpoints, args.out)
+            result.leaderboard.to_csv(os.path.join(args.out, "leaderboard.csv"), index=False)
+            result.rankings.to_csv(os.path.join(args.out, "rankings.csv"), index=False)
+
+    print(f"Ruleset {ruleset.version}.")
+    if result.resumed_from is None:
+        print("No submissions changed since the last run.")
+    else:
+        print(f"Recomputed from {result.resumed_from} onwards.")
+    print(result.leaderboard.head(10).to_string(index=False))
+    print()
+    print(", ".join(f"{name} {timing['seconds']:.2f}s" for name, timing in run.stages.items()))
+    if args.profile:
+        print(f"Profile written to {args.profile}")
+    return 0
+
+
+def cmd_sweep(args):
+    from sweep import config_grid, sweep
+
+    df = read_submissions(args.input)
+    if df.empty:
+        print("No submissions found.", file=sys.stderr)
+        return 1
+
+    # Settings that are not swept keep the ruleset's value
+    ruleset = get_ruleset(args.ruleset)
+    configs = config_grid(args.k or [ruleset.k], args.tie_threshold or [ruleset.tie_threshold],
+                          args.ratio_bonus or [ruleset.ratio_bonus], args.eflm_bonus or [ruleset.eflm_bonus],
+                          args.missing_penalty or [ruleset.missing_penalty])
+    all_params = ruleset.expected_parameters if args.fixed_params else None
+    log = os.path.join(os.path.dirname(args.out) or ".", "perf", "metrics.jsonl")
+    with perf.measure("sweep", log=log, configs=len(configs), mode=args.mode, ruleset=ruleset.version) as run:
+        result = sweep(df, configs, all_params, ruleset, mode=args.mode)
+
+    result.stability.to_csv(f"{args.out}_stability.csv", index=False)
+    result.final_elo.to_csv(f"{args.out}_final_elo.csv")
+    print(result.stability.to_string(index=False))
+    print(f"\n{len(result.stability)} configurations in {run.wall:.1f}s; "
+          f"written to {args.out}_stability.csv and {args.out}_final_elo.csv")
+    return 0
+
+
+def cmd_ingest(args):
+    from ingest import ingest
+
+    result = ingest(args.files, SubmissionStore(args.store))
+    print(f"Added {len(result.accepted):,} rows to {args.store}, rejected {len(result.rejected):,}.")
+    if args.rejects and not result.rejected.empty:
+        result.rejected.to_csv(args.rejects, index=False)
+        print(f"Rejection report written to {args.rejects}")
+    return 0
+
+
+def cmd_generate(args):
+    from synthetic import generate_submissions
+
+    df = generate_submissions(args.labs, parameters=args.params, months=MONTHS[:args.months],
+                              missing_rate=args.missing_rate, nan_rate=args.nan_rate, seed=args.seed)
+    if os.path.splitext(args.out)[1].lower() == ".parquet":
+        df.to_parquet(args.out, index=False)
+    elif os.path.splitext(args.out)[1].lower() == ".csv":
+        df.to_csv(args.out, index=False)
+    else:
+        SubmissionStore(args.out).append(df)
+    print(f"Wrote {len(df):,} submissions for {args.labs} labs to {args.out}")
+    return 0
+
+
+def cmd_bench(args):
+    from bench import run_benchmark
+
+    run_benchmark(labs=args.labs, modes=args.modes, params=args.params, months=args.months,
+                  missing_rate=args.missing_rate, nan_rate=args.nan_rate, seed=args.seed,
+                  sequential_max_labs=args.sequential_max_labs, log_max_labs=args.log_max_labs,
+                  verify_max_labs=args.verify_max_labs, out=args.out)
+    print(f"Results written to {args.out}")
+    return 0
+
+
+def cmd_assets(args):
+    from assets import build_all
+
+    for path in build_all():
+        print(f"{path} ({os.path.getsize(path) / 1024:,.0f} KB)")
+    return 0
+
+
+def _add_data_options(parser, params, months):
+    parser.add_argument("--params", type=int, default=params, help="How many EFLM parameters to use.")
+    parser.add_argument("--months", type=int, default=months, help="How many months, starting from Jan.")
+    parser.add_argument("--missing-rate", type=float, default=0.05, help="Share of submissions left out.")
+    parser.add_argument("--nan-rate", type=float, default=0.02, help="Share of CV/Ratio values left blank.")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="llkk", description="Lab Legend Kingdom Kvalis command line tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sim = commands.add_parser("simulate", help="Run the Fadzly battle simulation.")
+    sim.add_argument("--input", nargs="+", required=True,
+                     help="Submission store directories or CSV/Parquet/Excel files.")
+    sim.add_argument("--out", required=True, help="Directory for the results database, leaderboard and battles.")
+    sim.add_argument("--mode", choices=MODES, default="sequential", help="Battle update mode.")
+    sim.add_argument("--fixed-params", action="store_true",
+                     help="Penalize missing submissions against the fixed LLKK parameter list.")
+    sim.add_argument("--ruleset", choices=list(RULESETS), default=CURRENT.version,
+                     help="Scoring ruleset version; an older one reproduces historical results.")
+    sim.add_argument("--full", action="store_true", help="Ignore saved checkpoints and recompute every month.")
+    sim.add_argument("--workers", type=int, default=SIM_WORKERS,
+                     help="Processes sharing the (Parameter, Level) chains; defaults to $LLKK_WORKERS or 1.")
+    sim.add_argument("--profile", help="Write a cProfile of the run to this file (view with pstats or snakeviz).")
+    sim.set_defaults(func=cmd_simulate)
+
+    swp = commands.add_parser("sweep", help="Compare rankings across many scoring settings in one pass.")
+    swp.add_argument("--input", nargs="+", required=True,
+                     help="Submission store directories or CSV/Parquet/Excel files.")
+    swp.add_argument("--ruleset", choices=list(RULESETS), default=CURRENT.version,
+                     help="Ruleset for the baseline, EFLM targets and any setting not swept.")
+    swp.add_argument("--k", type=float, nargs="+", help="Elo K factors.")
+    swp.add_argument("--tie-threshold", type=float, nargs="+", help="CV differences below this are ties.")
+    swp.add_argument("--ratio-bonus", type=float, nargs="+")
+    swp.add_argument("--eflm-bonus", type=float, nargs="+")
+    swp.add_argument("--missing-penalty", type=float, nargs="+")
+    swp.add_argument("--mode", choices=MODES, default="sequential", help="Battle update mode.")
+    swp.add_argument("--fixed-params", action="store_true",
+                     help="Penalize missing submissions against the fixed LLKK parameter list.")
+    swp.add_argument("--out", default="sweep", help="Prefix for the <out>_stability.csv and <out>_final_elo.csv files.")
+    swp.set_defaults(func=cmd_sweep)
+
+    ing = commands.add_parser("ingest", help="Validate QC workbooks/CSVs and add the good rows to a store.")
+    ing.add_argument("files", nargs="+", help="Excel (.xlsx/.xls) or CSV files.")
+    ing.add_argument("--store", default=SUBMISSIONS_DIR, help="Submission store directory.")
+    ing.add_argument("--rejects", help="Write rejected rows and their reasons to this CSV.")
+    ing.set_defaults(func=cmd_ingest)
+
+    gen = commands.add_parser("generate", help="Write seeded synthetic submissions.")
+    gen.add_argument("--labs", type=int, default=100)
+    gen.add_argument("--out", required=True, help="A .csv or .parquet file, or a submission store directory.")
+    _add_data_options(gen, params=len(EFLM_TARGETS), months=12)
+    gen.set_defaults(func=cmd_generate)
+
+    bench = commands.add_parser("bench", help="Time each simulation stage across lab counts.")
+    bench.add_argument("--labs", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    bench.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    bench.add_argument("--sequential-max-labs", type=int, default=1000,
+                       help="Skip sequential replay above this many labs.")
+    bench.add_argument("--log-max-labs", type=int, default=1000,
+                       help="Only build and archive battle logs up to this many labs.")
+    bench.add_argument("--verify-max-labs", type=int, default=100,
+                       help="Check ratings against the pure-Python reference up to this many labs.")
+    bench.add_argument("--out", default="bench_results.json")
+    _add_data_options(bench, params=3, months=2)
+    bench.set_defaults(func=cmd_bench)
+
+    assets = commands.add_parser("assets", help="Pre-generate the resized, compressed app images.")
+    assets.set_defaults(func=cmd_assets)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
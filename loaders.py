@@ -0,0 +1,141 @@
+import os
+import threading
+from collections import namedtuple
+
+import pandas as pd
+import streamlit as st
+
+import perf
+from engine import ELO_HISTORY_FILE, ELO_PROGRESSION_FILE, RESULTS_DB_FILE, leaderboard
+from progression import ProgressionIndex
+from results_db import ResultsDB
+from store import CATEGORICAL, COLUMNS, DATA_DIR, SubmissionStore
+
+RESULTS_DB_PATH = os.path.join(DATA_DIR, RESULTS_DB_FILE)
+ELO_HISTORY_PATH = os.path.join(DATA_DIR, ELO_HISTORY_FILE)
+ELO_PROGRESSION_PATH = os.path.join(DATA_DIR, ELO_PROGRESSION_FILE)
+
+
+def fingerprint(paths):
+    """``(path, mtime_ns, size)`` for each existing file: one stat() per file, no reads."""
+    stamps = []
+    for path in paths:
+        try:
+            info = os.stat(path)
+        except FileNotFoundError:
+            continue
+        stamps.append((path, info.st_mtime_ns, info.st_size))
+    return tuple(stamps)
+
+
+# --- Submissions ---
+@st.cache_resource
+def _partition_cache():
+    """Process-wide ``{path: (mtime_ns, size, frame)}`` shared by every session."""
+    return {}, threading.Lock()
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _combine_partitions(root, stamps, labs=None):
+    with perf.measure("load_submissions", partitions=len(stamps)):
+        store = SubmissionStore(root)
+        cache, lock = _partition_cache()
+        # The lock only guards the dict: reads and the concat run outside it,
+        # so one session's cold load never holds up another's
+        with lock:
+            hits = [cache.get(path) for path, _, _ in stamps]
+        frames = []
+        for (path, mtime_ns, size), hit in zip(stamps, hits):
+            if hit is None or hit[:2] != (mtime_ns, size):
+                with perf.stage("read"):
+                    hit = (mtime_ns, size, store.read_partition(path))
+                perf.count("partitions_read", 1)
+                with lock:
+                    cache[path] = hit
+            frame = hit[2]
+            frames.append(frame if labs is None else frame[frame["Lab"].isin(labs)])
+
+        # Only runs on a fingerprint change: drop partitions that were deleted
+        with lock:
+            for path in [path for path in cache if path.startswith(root) and not os.path.exists(path)]:
+                del cache[path]
+
+        if not frames:
+            return store.scan()
+        with perf.stage("combine"):
+            df = pd.concat(frames, ignore_index=True)
+            for col in CATEGORICAL:
+                df[col] = df[col].astype("category")
+        perf.count("rows", len(df))
+        return df[COLUMNS]
+
+
+def load_submissions(labs=None, store=None):
+    """
+    All submissions (or just ``labs``') as one DataFrame, cached by file fingerprint.
+
+    An unchanged file set costs a stat() per month file. When files change,
+    only those months are re-read; the rest come from the shared cache.
+    """
+    store = store or SubmissionStore()
+    store.import_legacy_csv()
+    labs = None if labs is None else tuple(map(str, labs))
+    return _combine_partitions(store.root, fingerprint(store.files()), labs)
+
+
+# --- Simulation results ---
+def results_revision(path=RESULTS_DB_PATH):
+    """
+    Revision of the results database: one indexed lookup, and the cache key
+    for everything read from it. 0 or ``None`` when there are no results.
+    """
+    db = ResultsDB(path)
+    db.import_legacy(ELO_HISTORY_PATH, ELO_PROGRESSION_PATH)
+    return db.revision()
+
+
+SharedResults = namedtuple("SharedResults", ["revision", "ratings", "leaderboard", "rankings",
+                                             "progression", "progression_index"])
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _publish_results(path, revision):
+    """
+    Read, rank and index the results of ``revision`` once for the whole process.
+
+    Every session gets the same objects rather than a copy, so memory does not
+    grow with the number of viewers. They must be treated as read-only.
+    """
+    with perf.measure("load_results", revision=revision):
+        with perf.stage("read"):
+            ratings = ResultsDB(path).rating_table()
+            ratings.elo.flags.writeable = False
+            ratings.present.flags.writeable = False
+            progression = ResultsDB(path).progression()
+        perf.count("rows", len(progression))
+        with perf.stage("aggregation"):
+            board, rankings = leaderboard(ratings, breakdown=True)
+        with perf.stage("index"):
+            index = ProgressionIndex(progression)
+    return SharedResults(revision, ratings, board, rankings, progression, index)
+
+
+def shared_results(path=RESULTS_DB_PATH):
+    """
+    The published ``SharedResults`` of the latest simulation, or ``None`` when
+    there are none. A new save or a clear bumps the revision, which publishes
+    a fresh entry; the previous one is evicted once it is no longer the latest.
+    """
+    revision = results_revision(path)
+    if not revision:
+        return None
+    results = _publish_results(path, revision)
+    return results if len(results.ratings) else None
+
+
+def clear_results(path=RESULTS_DB_PATH):
+    """Delete all simulation results, including the legacy CSV files."""
+    ResultsDB(path).clear()
+    for file in [ELO_HISTORY_PATH, ELO_PROGRESSION_PATH]:
+        if os.path.exists(file):
+            os.remove(file)
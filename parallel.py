@@ -0,0 +1,123 @@
+"""
+Sharded simulation: each (Parameter, Level) Elo chain is independent of every
+other, so the chains run month by month in a process pool and are merged back
+in the same order the serial loop would have produced them.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from battle_archive import BattleArchive
+from engine import concat_frames, run_month
+from ratings import RatingTable
+from rules import CURRENT
+
+SHARD_COLUMNS = ["Lab", "Parameter", "Level", "Month", "CV (%)", "Ratio"]
+
+
+def _run_shard(task):
+    """Replay one (Parameter, Level) chain over ``months``; runs in a worker process."""
+    param, level, labs, rows, months, elo, present, penalized, ruleset, mode, archive_root = task
+
+    table = RatingTable()
+    table.lab_codes(labs)
+    table.code(1, param)
+    table.code(2, level)
+    n = len(labs)
+    table.elo[:n, 0, 0] = elo
+    table.present[:n, 0, 0] = present
+
+    lab_index = pd.Index(labs)
+    archive = None if archive_root is None else BattleArchive(archive_root)
+    by_month = {month: month_rows for month, month_rows in rows.groupby("Month", sort=False)}
+
+    snapshots, progression, battle_logs = [], [], []
+    for month in months:
+        month_rows = by_month.get(month, rows.iloc[:0])
+
+        if penalized:
+            submitted = np.zeros(n, dtype=bool)
+            submitted[lab_index.get_indexer(month_rows["Lab"])] = True
+            missing = np.flatnonzero(~submitted)
+            table.ensure_cells(missing, 0, 0)
+            table.elo[missing, 0, 0] -= ruleset.missing_penalty
+
+        if archive is not None and len(month_rows) > 1:
+            with archive.month_writer(month, part=f"{param}|{level}") as writer:
+                month_progression, month_logs = run_month(table, month_rows, month, ruleset, mode, writer.write)
+        else:
+            month_progression, month_logs = run_month(table, month_rows, month, ruleset, mode,
+                                                      keep_log=archive is None)
+
+        snapshots.append((table.elo[:n, 0, 0].copy(), table.present[:n, 0, 0].copy()))
+        progression.append(month_progression)
+        battle_logs.append(month_logs)
+
+    return snapshots, progression, battle_logs
+
+
+def run_sharded(df, ratings, checkpoints, months, fingerprints, all_params=None, ruleset=None,
+                mode="sequential", archive=None, workers=2, progress=None):
+    """
+    Recompute ``months`` starting from ``ratings`` with one task per
+    (Parameter, Level) and record each month in ``checkpoints``.
+
+    Ratings, progression rows and battle logs come out identical to the serial
+    loop: shards merge back in the (Parameter, Level) order of its groupby.
+    ``progress("battles", done, total)`` counts finished shards; an exception
+    it raises cancels the shards that have not started. Returns ``(ratings, battle_logs)``.
+    """
+    ruleset = ruleset or CURRENT
+    labs = pd.unique(df["Lab"]).tolist()
+    levels = pd.unique(df["Level"]).tolist()
+    params = pd.unique(df["Parameter"]).tolist()
+    expected = params if all_params is None else list(all_params)
+
+    # Shards with rows follow run_month's groupby order, penalty-only shards go last
+    recompute = df[df["Month"].isin(months)]
+    groups = {}
+    for key, rows in recompute.groupby(["Parameter", "Level"], observed=True):
+        groups[key] = rows[SHARD_COLUMNS].astype({col: object for col in ["Lab", "Parameter", "Level", "Month"]})
+    shard_keys = list(groups) + [(param, level) for param in expected for level in levels
+                                 if (param, level) not in groups]
+
+    # Register every code up front, in the order the serial penalty pass would
+    lab_codes = ratings.lab_codes(labs)
+    ratings.axis_codes(1, expected + params)
+    ratings.axis_codes(2, levels)
+    empty = recompute[SHARD_COLUMNS].iloc[:0].astype(object)
+    expected = set(expected)
+    tasks, addresses = [], []
+    for param, level in shard_keys:
+        p, l = ratings.code(1, param), ratings.code(2, level)
+        addresses.append((p, l))
+        tasks.append((
+            param, level, labs, groups.get((param, level), empty), months,
+            ratings.elo[lab_codes, p, l], ratings.present[lab_codes, p, l],
+            param in expected, ruleset, mode, None if archive is None else archive.root
+        ))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        try:
+            for result in pool.map(_run_shard, tasks, chunksize=max(1, len(tasks) // (4 * workers))):
+                results.append(result)
+                if progress is not None:
+                    progress("battles", len(results), len(tasks))
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            raise
+
+    battle_logs = []
+    for i, month in enumerate(months):
+        month_progression = []
+        for (p, l), (snapshots, progression, month_logs) in zip(addresses, results):
+            elo, present = snapshots[i]
+            ratings.elo[lab_codes, p, l] = elo
+            ratings.present[lab_codes, p, l] = present
+            month_progression.append(progression[i])
+            battle_logs.extend(month_logs[i])
+        checkpoints.record(month, fingerprints[month], ratings, concat_frames(month_progression))
+
+    return ratings, battle_logs
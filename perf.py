@@ -0,0 +1,206 @@
+"""
+Stage timings for simulations and data loads.
+
+``measure(kind)`` opens a run. Inside it, ``stage(name)`` adds wall time to a
+named stage and ``count(name, n)`` adds to a counter such as rows or pairs.
+Outside a run both do nothing, so the engine can call them unconditionally.
+Finished runs are appended to a rolling JSON-lines log. ``profile=<path>``
+also captures a cProfile of the run's own thread into that file.
+
+Peak memory is peak RSS. On Linux the kernel's high-water mark is reset when
+a run and each of its stages start, so runs and stages report their own peak.
+Runs in other threads of the same process reset it too and can hide part of
+a concurrent run's peak. Elsewhere only the process's all-time peak is
+available; such runs are marked ``"process"`` and get no per-stage figure.
+tracemalloc would be exact but slows the sequential replay about tenfold.
+"""
+import contextvars
+import cProfile
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+PERF_DIR = os.path.join("data", "perf")
+METRICS_FILE = os.path.join(PERF_DIR, "metrics.jsonl")
+HISTORY_SIZE = 200
+
+_current = contextvars.ContextVar("perf_run", default=None)
+_log_lock = threading.Lock()
+
+
+def reset_peak_rss():
+    """Restart the peak RSS from the current RSS; ``False`` where the OS cannot."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak RSS since the last ``reset_peak_rss()``, or since the process started."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Run:
+    def __init__(self, kind, **info):
+        self.id = uuid.uuid4().hex[:8]
+        self.kind = kind
+        self.info = info
+        self.started = time.time()
+        self.wall = None
+        self.error = None
+        self.profile = None
+        self.stages = {}
+        self.counts = {}
+        self.peak_scope = "run" if reset_peak_rss() else "process"
+        self.peak = 0.0
+
+    def start_stage(self):
+        if self.peak_scope == "run":
+            # Keep the peak reached between stages before restarting the count
+            self.peak = max(self.peak, peak_rss_mb())
+            reset_peak_rss()
+
+    def add_time(self, name, seconds):
+        entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+        entry["seconds"] += seconds
+        entry["calls"] += 1
+        if self.peak_scope == "run":
+            peak = peak_rss_mb()
+            entry["peak_rss_mb"] = max(entry.get("peak_rss_mb", 0.0), peak)
+            self.peak = max(self.peak, peak)
+
+    def peak_rss(self):
+        return max(self.peak, peak_rss_mb()) if self.peak_scope == "run" else peak_rss_mb()
+
+    def add_count(self, name, n):
+        self.counts[name] = self.counts.get(name, 0) + int(n)
+
+    def record(self):
+        battles = self.stages.get("battles", {}).get("seconds")
+        pairs = self.counts.get("pairs")
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "started": self.started,
+            "wall": self.wall,
+            "error": self.error,
+            "profile": self.profile,
+            "info": self.info,
+            "stages": self.stages,
+            "counts": self.counts,
+            "pairs_per_sec": pairs / battles if pairs and battles else None,
+            "peak_rss_mb": self.peak_rss(),
+            "peak_rss_scope": self.peak_scope,
+        }
+
+
+@contextmanager
+def measure(kind, log=METRICS_FILE, profile=None, **info):
+    """Time everything run inside the block as one ``kind`` run and log it to ``log``."""
+    run = Run(kind, **info)
+    token = _current.set(run)
+    profiler = None
+    if profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        yield run
+    except BaseException as exc:
+        run.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        run.wall = time.perf_counter() - start
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(os.path.dirname(profile) or ".", exist_ok=True)
+            profiler.dump_stats(profile)
+            run.profile = profile
+        _current.reset(token)
+        if log:
+            append_history(run.record(), log)
+
+
+@contextmanager
+def stage(name):
+    run = _current.get()
+    if run is None:
+        yield
+        return
+    run.start_stage()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.add_time(name, time.perf_counter() - start)
+
+
+def count(name, n):
+    run = _current.get()
+    if run is not None:
+        run.add_count(name, n)
+
+
+# --- History ---
+def read_history(log=METRICS_FILE):
+    """Logged runs, oldest first."""
+    if not os.path.exists(log):
+        return []
+    with open(log, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(record, log=METRICS_FILE, limit=HISTORY_SIZE):
+    """Add ``record`` to ``log``, keeping only the last ``limit`` runs."""
+    os.makedirs(os.path.dirname(log) or ".", exist_ok=True)
+    with _log_lock:
+        records = (read_history(log) + [record])[-limit:]
+        tmp = f"{log}.{os.getpid()}.{uuid.uuid4().hex[:6]}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in records:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp, log)
+
+
+def history_frame(records):
+    """One row per run: totals, counts and a ``<stage> (s)`` column per stage."""
+    import pandas as pd
+
+    rows = []
+    for entry in records:
+        row = {
+            "Run": entry["id"],
+            "Kind": entry["kind"],
+            "Started": pd.Timestamp(entry["started"], unit="s"),
+            "Wall (s)": round(entry["wall"] or 0.0, 3),
+            "Rows": entry["counts"].get("rows"),
+            "Pairs": entry["counts"].get("pairs"),
+            "Pairs/s": None if entry["pairs_per_sec"] is None else round(entry["pairs_per_sec"]),
+        }
+        # Records without a per-run peak (or from before it existed) hold the process's all-time peak
+        if entry.get("peak_rss_scope") == "run":
+            row["Peak RSS (MB)"] = entry["peak_rss_mb"]
+        else:
+            row["Process peak RSS (MB)"] = entry["peak_rss_mb"]
+        row["Error"] = entry["error"]
+        for name, timing in entry["stages"].items():
+            row[f"{name} (s)"] = round(timing["seconds"], 3)
+        rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from engine import calendar_order
+
+# Points per line sent to the browser; longer series are thinned evenly
+MAX_POINTS = 60
+ENVELOPE_QUANTILES = {"Min": 0.0, "Q1": 0.25, "Median": 0.5, "Q3": 0.75, "Max": 1.0}
+
+
+def downsample(n, max_points=MAX_POINTS):
+    """Evenly spaced positions into a series of length ``n``, first and last always kept."""
+    if n <= max_points:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n - 1, max_points).round().astype(np.intp))
+
+
+class ProgressionIndex:
+    """
+    The Elo progression table sorted once by (Parameter, Level, Lab, month),
+    with the row range of every series and every (Parameter, Level) group kept
+    in dicts. A lookup slices its rows instead of filtering the whole table.
+    """
+
+    def __init__(self, progression):
+        self.source = progression
+        self.group_bounds = {}
+        self.series_bounds = {}
+        self._envelopes = {}
+        if progression is None or progression.empty:
+            progression = pd.DataFrame({"Lab": [], "Parameter": [], "Level": [], "Month": [], "Elo": []})
+
+        lab_idx, labs = pd.factorize(progression["Lab"])
+        param_idx, params = pd.factorize(progression["Parameter"])
+        level_idx, levels = pd.factorize(progression["Level"])
+        self.months = calendar_order(progression["Month"].unique())
+        month_rank = pd.Index(self.months).get_indexer(progression["Month"])
+
+        order = np.lexsort((month_rank, lab_idx, level_idx, param_idx))
+        lab_idx, param_idx, level_idx = lab_idx[order], param_idx[order], level_idx[order]
+        self.labs, self.params, self.levels = labs.tolist(), params.tolist(), levels.tolist()
+        self.lab = np.asarray(labs, dtype=object)[lab_idx]
+        self.month = np.asarray(progression["Month"], dtype=object)[order]
+        self.elo = progression["Elo"].to_numpy(dtype=float)[order]
+        if not len(order):
+            return
+
+        group_change = (np.diff(param_idx) != 0) | (np.diff(level_idx) != 0)
+        series_change = group_change | (np.diff(lab_idx) != 0)
+        for bounds, change, key_of in [
+            (self.group_bounds, group_change, lambda i: (params[param_idx[i]], levels[level_idx[i]])),
+            (self.series_bounds, series_change,
+             lambda i: (labs[lab_idx[i]], params[param_idx[i]], levels[level_idx[i]])),
+        ]:
+            starts = np.concatenate(([0], np.flatnonzero(change) + 1))
+            stops = np.append(starts[1:], len(order))
+            for start, stop in zip(starts.tolist(), stops.tolist()):
+                bounds[key_of(start)] = (start, stop)
+
+    def __len__(self):
+        return len(self.elo)
+
+    def series(self, lab, param, level, max_points=MAX_POINTS):
+        """One lab's Month/Elo rows in calendar order."""
+        start, stop = self.series_bounds.get((lab, param, level), (0, 0))
+        keep = start + downsample(stop - start, max_points)
+        return pd.DataFrame({"Month": self.month[keep], "Elo": self.elo[keep]})
+
+    def compare(self, labs, param, level, max_points=MAX_POINTS):
+        """Lab/Month/Elo rows for several labs on one (Parameter, Level)."""
+        frames = []
+        for lab in labs:
+            frame = self.series(lab, param, level, max_points)
+            frame.insert(0, "Lab", lab)
+            frames.append(frame)
+        if not frames:
+            return pd.DataFrame(columns=["Lab", "Month", "Elo"])
+        return pd.concat(frames, ignore_index=True)
+
+    def envelope(self, param, level):
+        """Per-month spread of every lab's Elo on one (Parameter, Level), computed once."""
+        key = (param, level)
+        if key not in self._envelopes:
+            start, stop = self.group_bounds.get(key, (0, 0))
+            if start == stop:
+                return pd.DataFrame(columns=["Month", *ENVELOPE_QUANTILES, "Labs"])
+            group = pd.DataFrame({"Month": self.month[start:stop], "Elo": self.elo[start:stop]})
+            spread = group.groupby("Month", sort=False)["Elo"].quantile(list(ENVELOPE_QUANTILES.values()))
+            spread = spread.unstack()
+            spread.columns = list(ENVELOPE_QUANTILES)
+            spread["Labs"] = group.groupby("Month", sort=False).size()
+            order = [month for month in self.months if month in spread.index]
+            self._envelopes[key] = spread.loc[order].rename_axis("Month").reset_index()
+        return self._envelopes[key]
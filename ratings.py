@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+START_RATING = 1500
+
+
+class RatingTable:
+    """
+    Elo ratings indexed by integer codes for (Lab, Parameter, Level).
+
+    Ratings live in a dense ``lab x parameter x level`` float array. ``present``
+    marks the cells that have actually been rated, which is what the old
+    ``"lab_param_level"`` dict keys used to record.
+    """
+
+    AXES = ("Lab", "Parameter", "Level")
+
+    def __init__(self):
+        self.names = ([], [], [])
+        self.codes = ({}, {}, {})
+        self.elo = np.full((0, 0, 0), float(START_RATING))
+        self.present = np.zeros((0, 0, 0), dtype=bool)
+
+    @property
+    def labs(self):
+        return self.names[0]
+
+    @property
+    def params(self):
+        return self.names[1]
+
+    @property
+    def levels(self):
+        return self.names[2]
+
+    def __len__(self):
+        return int(self.present.sum())
+
+    def copy(self):
+        table = RatingTable()
+        table.names = tuple(list(names) for names in self.names)
+        table.codes = tuple(dict(codes) for codes in self.codes)
+        table.elo = self.elo.copy()
+        table.present = self.present.copy()
+        return table
+
+    # --- Codes ---
+    def code(self, axis, name):
+        """Code for ``name`` on ``axis`` (0=Lab, 1=Parameter, 2=Level), adding it if new."""
+        codes = self.codes[axis]
+        code = codes.get(name)
+        if code is None:
+            code = len(codes)
+            codes[name] = code
+            self.names[axis].append(name)
+            self._reserve(axis, code + 1)
+        return code
+
+    def axis_codes(self, axis, names):
+        return np.array([self.code(axis, name) for name in names], dtype=np.intp)
+
+    def lab_codes(self, labs):
+        return self.axis_codes(0, labs)
+
+    def _reserve(self, axis, size):
+        capacity = self.elo.shape[axis]
+        if size <= capacity:
+            return
+        new_shape = list(self.elo.shape)
+        new_shape[axis] = max(size, 2 * capacity, 4)
+        elo = np.full(new_shape, float(START_RATING))
+        present = np.zeros(new_shape, dtype=bool)
+        old = tuple(slice(0, n) for n in self.elo.shape)
+        elo[old] = self.elo
+        present[old] = self.present
+        self.elo, self.present = elo, present
+
+    # --- Ratings ---
+    def ensure(self, labs, param, level):
+        """Register ``labs`` under (param, level) and return ``(lab_codes, p, l)``."""
+        lab_codes = self.lab_codes(labs)
+        p = self.code(1, param)
+        l = self.code(2, level)
+        self.ensure_cells(lab_codes, p, l)
+        return lab_codes, p, l
+
+    def ensure_cells(self, lab_codes, p, l):
+        """Start any unrated cells among the coded ``(lab, p, l)`` triples at 1500."""
+        fresh = ~self.present[lab_codes, p, l]
+        cells = tuple(np.broadcast_arrays(lab_codes, p, l))
+        cells = tuple(axis[fresh] for axis in cells)
+        self.elo[cells] = START_RATING
+        self.present[cells] = True
+
+    def get(self, lab, param, level, default=None):
+        lab_code = self.codes[0].get(lab)
+        p = self.codes[1].get(param)
+        l = self.codes[2].get(level)
+        if lab_code is None or p is None or l is None or not self.present[lab_code, p, l]:
+            return default
+        return float(self.elo[lab_code, p, l])
+
+    def used(self):
+        """Slices covering the codes handed out so far (the arrays keep spare capacity)."""
+        return tuple(slice(0, len(names)) for names in self.names)
+
+    # --- Persistence ---
+    def to_frame(self):
+        lab_codes, p, l = np.nonzero(self.present[self.used()])
+        return pd.DataFrame({
+            "Lab": np.asarray(self.labs, dtype=object)[lab_codes],
+            "Parameter": np.asarray(self.params, dtype=object)[p],
+            "Level": np.asarray(self.levels, dtype=object)[l],
+            "elo": self.elo[lab_codes, p, l]
+        })
+
+    @classmethod
+    def from_frame(cls, df):
+        table = cls()
+        if "Unnamed: 0" in df.columns:
+            # Legacy elo_history.csv keyed by "lab_param_level" strings
+            parts = df["Unnamed: 0"].astype(str).str.rsplit("_", n=2, expand=True)
+            df = pd.DataFrame({"Lab": parts[0], "Parameter": parts[1], "Level": parts[2], "elo": df["elo"]})
+
+        # Codes are handed out per axis in order of first appearance
+        codes = []
+        for axis, col in enumerate(cls.AXES):
+            idx, names = pd.factorize(df[col])
+            codes.append(table.axis_codes(axis, names)[idx])
+        table.elo[tuple(codes)] = df["elo"].to_numpy(dtype=float)
+        table.present[tuple(codes)] = True
+        return table
+
+    def to_csv(self, path):
+        self.to_frame().to_csv(path, index=False)
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls.from_frame(pd.read_csv(path, float_precision="round_trip"))
@@ -0,0 +1,228 @@
+"""
+Simulation results in an embedded SQLite database.
+
+Final ratings, per-month rating snapshots, progression rows and the checkpoint
+fingerprints live in indexed tables, next to the ruleset the simulation ran
+with. The database runs in WAL mode, so any
+number of sessions can read while a simulation writes. Each save is one
+transaction that only touches the months that changed.
+"""
+import json
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from engine import Checkpoints
+from ratings import RatingTable
+from rules import from_json, to_json
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value BLOB);
+CREATE TABLE IF NOT EXISTS months (
+    month TEXT PRIMARY KEY, position INTEGER NOT NULL, fingerprint TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    lab TEXT NOT NULL, parameter TEXT NOT NULL, level TEXT NOT NULL, elo REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ratings_key ON ratings (lab, parameter, level);
+CREATE INDEX IF NOT EXISTS ratings_parameter ON ratings (parameter, level);
+CREATE TABLE IF NOT EXISTS snapshots (
+    month TEXT NOT NULL, lab TEXT NOT NULL, parameter TEXT NOT NULL, level TEXT NOT NULL, elo REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_month ON snapshots (month);
+CREATE INDEX IF NOT EXISTS snapshots_lab ON snapshots (lab, parameter, level);
+CREATE TABLE IF NOT EXISTS progression (
+    month TEXT NOT NULL, lab TEXT NOT NULL, parameter TEXT NOT NULL, level TEXT NOT NULL, elo REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS progression_month ON progression (month);
+CREATE INDEX IF NOT EXISTS progression_lab ON progression (lab, parameter, level);
+CREATE INDEX IF NOT EXISTS progression_parameter ON progression (parameter, level);
+"""
+
+# Table column -> frame column
+RATING_COLUMNS = {"lab": "Lab", "parameter": "Parameter", "level": "Level", "elo": "elo"}
+SNAPSHOT_COLUMNS = {"month": "Month", **RATING_COLUMNS}
+PROGRESSION_COLUMNS = {"lab": "Lab", "parameter": "Parameter", "level": "Level", "month": "Month", "elo": "Elo"}
+
+
+def _decode_signature(stored):
+    """The checkpoint signature saved as JSON; ``None`` if missing or unreadable (e.g. an older pickled one)."""
+    try:
+        (labs, params, levels), mode, ruleset = json.loads(stored)
+    except (TypeError, ValueError):
+        return None
+    return (tuple(labs), tuple(params), tuple(levels)), mode, ruleset
+
+
+class ResultsDB:
+    def __init__(self, path):
+        self.path = path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _meta(self, conn, key, default=None):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def _bump_revision(self, conn):
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('revision', ?)", (self._meta(conn, "revision", 0) + 1,))
+
+    def revision(self):
+        """Counter bumped by every save; ``None`` before the database exists."""
+        if not self.exists():
+            return None
+        with closing(self.connect()) as conn:
+            return self._meta(conn, "revision", 0)
+
+    # --- Writes ---
+    def save(self, checkpoints):
+        """
+        Bring the database in line with ``checkpoints`` in one transaction.
+
+        Months whose position and fingerprint are unchanged keep their rows;
+        every later month is deleted and re-inserted with ``executemany``, and
+        the final ratings are replaced. Returns whether anything was written.
+        """
+        with closing(self.connect()) as conn:
+            with conn:
+                # Take the write lock up front so two saves cannot interleave
+                conn.execute("BEGIN IMMEDIATE")
+                stored = conn.execute("SELECT month, fingerprint FROM months ORDER BY position").fetchall()
+                current = [(month, checkpoints.fingerprints[month]) for month in checkpoints.months]
+                signature = self._meta(conn, "signature")
+                unchanged = signature is not None and _decode_signature(signature) == checkpoints.signature
+
+                # Leading months with the same name and fingerprint keep their rows
+                start = 0
+                while unchanged and start < min(len(stored), len(current)) and stored[start] == current[start]:
+                    start += 1
+                if unchanged and start == len(current) == len(stored):
+                    return False
+
+                kept = checkpoints.months[:start]
+                marks = ", ".join("?" * len(kept))
+                for table in ["months", "snapshots", "progression"]:
+                    conn.execute(f"DELETE FROM {table} WHERE month NOT IN ({marks})", kept)
+
+                for position, month in enumerate(checkpoints.months[start:], start):
+                    conn.execute("INSERT INTO months VALUES (?, ?, ?)",
+                                 (month, position, checkpoints.fingerprints[month]))
+                    snapshot = checkpoints.ratings[month].to_frame()
+                    conn.executemany("INSERT INTO snapshots VALUES (?, ?, ?, ?, ?)",
+                                     ((month, *row) for row in snapshot.itertuples(index=False, name=None)))
+                    progression = checkpoints.progression[month]
+                    if not progression.empty:
+                        rows = progression[["Month", "Lab", "Parameter", "Level", "Elo"]]
+                        conn.executemany("INSERT INTO progression VALUES (?, ?, ?, ?, ?)",
+                                         rows.itertuples(index=False, name=None))
+
+                conn.execute("DELETE FROM ratings")
+                latest = checkpoints.latest()
+                if latest is not None:
+                    conn.executemany("INSERT INTO ratings VALUES (?, ?, ?, ?)",
+                                     latest.to_frame().itertuples(index=False, name=None))
+
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('signature', ?)",
+                             (json.dumps(checkpoints.signature),))
+                if checkpoints.ruleset is not None:
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('ruleset', ?)", (to_json(checkpoints.ruleset),))
+                self._bump_revision(conn)
+        return True
+
+    def clear(self):
+        """Delete every result; readers see the empty state after the commit."""
+        if not self.exists():
+            return
+        with closing(self.connect()) as conn:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for table in ["months", "ratings", "snapshots", "progression"]:
+                    conn.execute(f"DELETE FROM {table}")
+                conn.execute("DELETE FROM meta WHERE key IN ('signature', 'ruleset')")
+                self._bump_revision(conn)
+
+    def import_legacy(self, history_path, progression_path=None):
+        """One-off import of the old elo_history.csv / elo_progression.csv into a new database."""
+        if self.exists() or not os.path.exists(history_path):
+            return False
+        ratings = RatingTable.from_csv(history_path).to_frame()
+        with closing(self.connect()) as conn:
+            with conn:
+                conn.executemany("INSERT INTO ratings VALUES (?, ?, ?, ?)", ratings.itertuples(index=False, name=None))
+                if progression_path and os.path.exists(progression_path):
+                    progression = pd.read_csv(progression_path)
+                    conn.executemany("INSERT INTO progression VALUES (?, ?, ?, ?, ?)",
+                                     progression[["Month", "Lab", "Parameter", "Level", "Elo"]]
+                                     .itertuples(index=False, name=None))
+                self._bump_revision(conn)
+        return True
+
+    # --- Reads ---
+    def _select(self, table, columns, labs=None, parameters=None, levels=None, months=None):
+        """Rows of ``table`` in insertion order; each filter is an indexed ``IN`` lookup."""
+        clauses, params = [], []
+        for column, values in [("lab", labs), ("parameter", parameters), ("level", levels), ("month", months)]:
+            if values is not None:
+                values = list(values)
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        select = ", ".join(f'{column} AS "{name}"' for column, name in columns.items())
+        with closing(self.connect()) as conn:
+            return pd.read_sql_query(f"SELECT {select} FROM {table}{where} ORDER BY rowid", conn, params=params)
+
+    def ratings(self, labs=None, parameters=None, levels=None):
+        """Final ratings as Lab/Parameter/Level/elo rows."""
+        return self._select("ratings", RATING_COLUMNS, labs, parameters, levels)
+
+    def rating_table(self):
+        return RatingTable.from_frame(self.ratings())
+
+    def snapshots(self, labs=None, parameters=None, levels=None, months=None):
+        """Ratings as they stood after each month."""
+        return self._select("snapshots", SNAPSHOT_COLUMNS, labs, parameters, levels, months)
+
+    def progression(self, labs=None, parameters=None, levels=None, months=None):
+        return self._select("progression", PROGRESSION_COLUMNS, labs, parameters, levels, months)
+
+    def ruleset(self):
+        """The ``rules.Ruleset`` the saved results were computed with; ``None`` if unknown."""
+        if not self.exists():
+            return None
+        with closing(self.connect()) as conn:
+            stored = self._meta(conn, "ruleset")
+        return None if stored is None else from_json(stored)
+
+    def load_checkpoints(self):
+        """Rebuild the resumable ``Checkpoints`` of the last saved simulation."""
+        checkpoints = Checkpoints()
+        if not self.exists():
+            return checkpoints
+        with closing(self.connect()) as conn:
+            months = conn.execute("SELECT month, fingerprint FROM months ORDER BY position").fetchall()
+            signature = _decode_signature(self._meta(conn, "signature"))
+        if not months or signature is None:
+            return checkpoints
+
+        snapshots = {month: frame for month, frame in self.snapshots().groupby("Month", sort=False)}
+        progression = {month: frame for month, frame in self.progression().groupby("Month", sort=False)}
+        checkpoints.signature = signature
+        checkpoints.ruleset = self.ruleset()
+        for month, fingerprint in months:
+            checkpoints.months.append(month)
+            checkpoints.fingerprints[month] = fingerprint
+            snapshot = snapshots.get(month, pd.DataFrame(columns=list(SNAPSHOT_COLUMNS.values())))
+            checkpoints.ratings[month] = RatingTable.from_frame(snapshot)
+            checkpoints.progression[month] = progression.get(month, pd.DataFrame()).reset_index(drop=True)
+        return checkpoints
@@ -0,0 +1,141 @@
+"""
+Versioned scoring rulesets.
+
+A ruleset fixes everything that decides a simulation's scores: the Elo K
+factor, the CV tie threshold, the ratio/EFLM bonuses, the missing-submission
+penalty, the EFLM CV target per parameter and the parameter list the penalty
+expects. It also names each parameter once, with the aliases labs and legacy
+workbooks use for it. Every simulation stores the ruleset it ran with next to
+its results (``ResultsDB.ruleset``). Older versions stay in ``RULESETS`` so
+historical results can be reproduced exactly.
+
+Rulesets are never edited in place: a change is a new version.
+"""
+import json
+import re
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+Ruleset = namedtuple("Ruleset", [
+    "version", "k", "tie_threshold", "ratio_bonus", "eflm_bonus", "missing_penalty",
+    "parameters", "aliases", "eflm_targets", "expected_parameters",
+])
+
+# The constants the engine shipped with. No canonical names or aliases: parameters are
+# matched exactly as submitted, so "Bilirubin (Total)" never met the "Bilirubin" target.
+RULESET_2025_1 = Ruleset(
+    version="2025.1",
+    k=16, tie_threshold=0.1, ratio_bonus=5, eflm_bonus=2, missing_penalty=10,
+    parameters=(),
+    aliases={},
+    eflm_targets={
+        "Albumin": 2.1, "ALT": 6.0, "ALP": 5.4, "AST": 5.3, "Bilirubin": 8.6,
+        "Cholesterol": 2.9, "CK": 4.5, "Creatinine": 3.4, "GGT": 7.7, "Glucose": 2.9,
+        "HDL Cholesterol": 4.0, "LDL Cholesterol": 4.9, "Potassium": 1.8, "Sodium": 0.9,
+        "Total Protein": 2.0, "Urea": 3.9, "Uric Acid": 3.3,
+    },
+    expected_parameters=("Albumin", "ALT", "Creatinine", "Cholesterol", "Glucose", "Urea",
+                         "AST", "Sodium", "Potassium", "LDH", "CK", "GGT",
+                         "HDL Cholesterol", "Total Protein", "Direct Bilirubin", "Uric Acid"),
+)
+
+# Same scoring, one name per parameter: Data Entry, bulk uploads, the EFLM targets and the
+# penalty list all resolve to these
+RULESET_2025_2 = RULESET_2025_1._replace(
+    version="2025.2",
+    parameters=("Albumin", "ALP", "ALT", "AST", "Bilirubin (Total)", "Cholesterol", "CK", "Creatinine",
+                "Direct Bilirubin", "GGT", "Glucose", "HDL Cholesterol", "LDH", "LDL Cholesterol",
+                "Potassium", "Sodium", "Total Protein", "Triglycerides", "Urea", "Uric Acid"),
+    aliases={
+        # Names used by earlier versions of the app
+        "Bilirubin": "Bilirubin (Total)", "Total Bilirubin": "Bilirubin (Total)",
+        "Protein (Total)": "Total Protein",
+        # Short names from the legacy monthly workbooks
+        "Glu": "Glucose", "Cre": "Creatinine", "Chol": "Cholesterol", "Alb": "Albumin",
+        "Na": "Sodium", "K": "Potassium", "TP": "Total Protein", "UA": "Uric Acid",
+        "TBil": "Bilirubin (Total)", "DBil": "Direct Bilirubin", "HDL": "HDL Cholesterol",
+        "LDL": "LDL Cholesterol", "TG": "Triglycerides",
+    },
+    eflm_targets={
+        "Albumin": 2.1, "ALT": 6.0, "ALP": 5.4, "AST": 5.3, "Bilirubin (Total)": 8.6,
+        "Cholesterol": 2.9, "CK": 4.5, "Creatinine": 3.4, "GGT": 7.7, "Glucose": 2.9,
+        "HDL Cholesterol": 4.0, "LDL Cholesterol": 4.9, "Potassium": 1.8, "Sodium": 0.9,
+        "Total Protein": 2.0, "Urea": 3.9, "Uric Acid": 3.3,
+    },
+)
+
+RULESETS = {ruleset.version: ruleset for ruleset in [RULESET_2025_1, RULESET_2025_2]}
+CURRENT = RULESET_2025_2
+
+
+def get_ruleset(version=None):
+    """The ruleset called ``version``; the current one for ``None``."""
+    if version is None:
+        return CURRENT
+    try:
+        return RULESETS[version]
+    except KeyError:
+        raise ValueError(f"Unknown ruleset: {version!r}") from None
+
+
+# --- Parameter names ---
+def _name_key(name):
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+def _name_lookup(ruleset):
+    lookup = {_name_key(name): name for name in ruleset.parameters}
+    lookup.update((_name_key(alias), name) for alias, name in ruleset.aliases.items())
+    return lookup
+
+
+def canonical_parameter(name, ruleset=None):
+    """``name`` as the ruleset spells it; ignores case, spaces and punctuation. Unknown names pass through."""
+    return _name_lookup(ruleset or CURRENT).get(_name_key(name), name)
+
+
+def canonicalize(params, ruleset=None):
+    """``canonical_parameter`` over a Series, resolving each distinct name once."""
+    lookup = _name_lookup(ruleset or CURRENT)
+    if not lookup:
+        return params
+    if isinstance(params.dtype, pd.CategoricalDtype):
+        renamed = [lookup.get(_name_key(name), name) for name in params.cat.categories]
+        if len(set(renamed)) == len(renamed):
+            return params.cat.rename_categories(renamed)
+        # Two spellings of one parameter merge, which categories cannot express
+        params = params.astype(object)
+    return params.map({name: lookup.get(_name_key(name), name) for name in pd.unique(params.dropna())})
+
+
+# --- Compiled form ---
+class CompiledRules:
+    """
+    A ruleset's per-parameter values as arrays indexed by parameter code.
+    ``params`` is the code order; ``eflm_targets[code]`` is NaN when the
+    parameter has no target, so ``cv <= target`` is simply false for it.
+    """
+
+    def __init__(self, ruleset, params):
+        self.ruleset = ruleset
+        self.params = pd.Index(params)
+        # One extra NaN slot so get_indexer's -1 for an unknown parameter lands on "no target"
+        self.eflm_targets = np.array([ruleset.eflm_targets.get(param, np.nan) for param in self.params] + [np.nan])
+
+    def targets(self, params):
+        """EFLM target of each name in ``params`` (NaN for none)."""
+        return self.eflm_targets[self.params.get_indexer(params)]
+
+
+# --- Storage ---
+def to_json(ruleset):
+    return json.dumps(ruleset._asdict(), sort_keys=True)
+
+
+def from_json(text):
+    data = json.loads(text)
+    data["parameters"] = tuple(data["parameters"])
+    data["expected_parameters"] = tuple(data["expected_parameters"])
+    return Ruleset(**data)
@@ -0,0 +1,252 @@
+import glob
+import hashlib
+import os
+import threading
+from urllib.parse import quote, unquote
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DATA_DIR = "data"
+SUBMISSIONS_DIR = os.path.join(DATA_DIR, "submissions")
+LEGACY_PATTERN = os.path.join(DATA_DIR, "submission_*.csv")
+
+KEY_COLUMNS = ["Lab", "Parameter", "Level", "Month"]
+COLUMNS = KEY_COLUMNS + ["CV (%)", "n (QC)", "Working Days", "Ratio"]
+CATEGORICAL = ["Lab", "Parameter", "Level", "Month"]
+
+# Month is the partition key, so it is not stored inside the files
+FILE_SCHEMA = pa.schema([
+    ("Lab", pa.string()),
+    ("Parameter", pa.string()),
+    ("Level", pa.string()),
+    ("CV (%)", pa.float64()),
+    ("n (QC)", pa.float64()),
+    ("Working Days", pa.float64()),
+    ("Ratio", pa.float64()),
+])
+PARTITIONING = ds.partitioning(pa.schema([("Month", pa.string())]), flavor="hive")
+# Parquet footer key holding a hash of the partition's rows
+HASH_KEY = b"llkk_content_hash"
+# The one file of a Month partition
+MONTH_FILE = "submissions.parquet"
+
+# Writes read, merge and rewrite a whole month; sessions are threads of one server
+_write_lock = threading.Lock()
+
+
+class SubmissionStore:
+    """
+    Lab submissions as Parquet files partitioned by Month.
+
+    Layout is ``<root>/Month=<month>/submissions.parquet``: one file per month
+    with each lab's rows kept together, so the whole store is one columnar scan
+    over twelve files and a lab is filtered inside the scan. A save reads,
+    merges and rewrites only the months it touches.
+
+    Each file is replaced atomically (temp file + rename) and carries a hash
+    of its rows, so rewriting identical content never touches the disk.
+    Months still in the older one-file-per-lab layout are read as they are
+    and converted the first time they are written.
+    """
+
+    def __init__(self, root=SUBMISSIONS_DIR):
+        self.root = root
+
+    # --- Layout ---
+    def _month_dir(self, month):
+        return os.path.join(self.root, f"Month={quote(str(month), safe='')}")
+
+    def _path(self, month):
+        return os.path.join(self._month_dir(month), MONTH_FILE)
+
+    def _legacy_files(self, month_dir):
+        return sorted(path for path in glob.glob(os.path.join(month_dir, "*.parquet"))
+                      if os.path.basename(path) != MONTH_FILE)
+
+    def files(self, months=None):
+        """Sorted partition files, optionally pruned by month."""
+        if months is None:
+            month_dirs = glob.glob(os.path.join(self.root, "Month=*"))
+        else:
+            month_dirs = map(self._month_dir, months)
+        paths = []
+        for month_dir in month_dirs:
+            path = os.path.join(month_dir, MONTH_FILE)
+            paths.extend([path] if os.path.exists(path) else self._legacy_files(month_dir))
+        return sorted(paths)
+
+    def has_data(self):
+        return bool(self.files())
+
+    # --- Writes ---
+    def _write_month(self, month, rows):
+        """
+        Atomically replace ``month``'s partition with ``rows`` (deleting it when
+        there are none). Nothing is written when the file already holds exactly
+        these rows; returns whether anything changed.
+        """
+        path = self._path(month)
+        legacy = self._legacy_files(self._month_dir(month))
+        if rows.empty:
+            stale = [file for file in [path] + legacy if os.path.exists(file)]
+            for file in stale:
+                os.remove(file)
+            return bool(stale)
+
+        # Each lab's rows stay together and in order, so equal content hashes equal
+        rows = rows.iloc[np.argsort(rows["Lab"].to_numpy(), kind="stable")]
+        table = pa.Table.from_pandas(rows, schema=FILE_SCHEMA, preserve_index=False)
+        digest = content_hash(table)
+        if stored_hash(path) == digest and not legacy:
+            return False
+
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), HASH_KEY: digest.encode()})
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Readers only ever see the old file or the complete new one
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            pq.write_table(table, tmp)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        # Once the month file exists readers ignore the per-lab files it replaces
+        for file in legacy:
+            os.remove(file)
+        return True
+
+    def _read_month(self, month):
+        paths = self.files(months=[month])
+        if not paths:
+            return _normalize(pd.DataFrame(columns=COLUMNS))
+        return pd.concat(map(self.read_partition, paths), ignore_index=True)
+
+    def append(self, df):
+        """
+        Merge ``df`` into the Month partitions it touches by
+        (Lab, Parameter, Level, Month) key: a row replaces the stored row with
+        its key in place, new keys go after the stored rows. Returns the number
+        of month files rewritten.
+        """
+        df = _normalize(df).drop_duplicates(KEY_COLUMNS, keep="last")
+        written = 0
+        with _write_lock:
+            for month, rows in df.groupby("Month", sort=False):
+                stored = self._read_month(month)
+                # Only the labs in ``rows`` can have keys to replace
+                touched = stored["Lab"].isin(rows["Lab"].unique())
+                merged = merge_by_key(stored[touched], rows)
+                written += self._write_month(month, pd.concat([stored[~touched], merged], ignore_index=True))
+        return written
+
+    def delete_lab(self, lab):
+        self.replace_lab(lab, pd.DataFrame(columns=COLUMNS))
+
+    def replace_lab(self, lab, df):
+        """Make ``df`` the complete set of submissions for ``lab``."""
+        months = set(self.scan(columns=["Month"], labs=[lab])["Month"].astype(str))
+        return self.replace_lab_months(lab, df, months | set(_normalize(df)["Month"]))
+
+    def replace_lab_months(self, lab, df, months):
+        """
+        Make ``df`` ``lab``'s complete submissions for ``months``; its other
+        months and other labs are left alone. Returns the number of month files changed.
+        """
+        df = _normalize(df)
+        df = df[df["Lab"] == str(lab)]
+        changed = 0
+        with _write_lock:
+            for month in months:
+                stored = self._read_month(month)
+                rows = pd.concat([stored[stored["Lab"] != str(lab)], df[df["Month"] == str(month)]],
+                                 ignore_index=True)
+                changed += self._write_month(month, rows)
+        return changed
+
+    # --- Reads ---
+    def read_partition(self, path):
+        """One partition file as a DataFrame with its Month column restored."""
+        df = pq.read_table(path).to_pandas()
+        df["Month"] = unquote(os.path.basename(os.path.dirname(path)).split("=", 1)[1])
+        return df[COLUMNS]
+
+    def scan(self, columns=None, months=None, parameters=None, labs=None):
+        """
+        Read submissions with column projection and filter pushdown.
+
+        ``months`` prunes partition files before anything is opened; ``labs``
+        and ``parameters`` are pushed into the Parquet scan. Key columns come
+        back as categoricals.
+        """
+        columns = list(columns) if columns is not None else list(COLUMNS)
+        paths = self.files(months=months)
+        if paths:
+            dataset = ds.dataset(paths, format="parquet", schema=FILE_SCHEMA.append(pa.field("Month", pa.string())),
+                                 partitioning=PARTITIONING, partition_base_dir=self.root)
+            condition = None
+            for column, values in [("Lab", labs), ("Parameter", parameters)]:
+                if values is not None:
+                    expr = ds.field(column).isin([str(value) for value in values])
+                    condition = expr if condition is None else condition & expr
+            df = dataset.to_table(columns=columns, filter=condition).to_pandas()
+        else:
+            df = _normalize(pd.DataFrame(columns=COLUMNS))[columns]
+
+        for col in CATEGORICAL:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        return df
+
+    def import_legacy_csv(self, pattern=LEGACY_PATTERN):
+        """One-off import of the old ``data/submission_<lab>.csv`` files into an empty store."""
+        if self.has_data():
+            return 0
+        files = sorted(glob.glob(pattern))
+        if files:
+            # One append, so each month is written once
+            self.append(pd.concat([pd.read_csv(file) for file in files], ignore_index=True))
+        return len(files)
+
+
+def content_hash(table):
+    """Hash of a partition table's values, in row order; independent of how its buffers are laid out."""
+    digest = hashlib.sha1()
+    for column in table.columns:
+        values = column.to_numpy(zero_copy_only=False)
+        if values.dtype == object:
+            digest.update("\x1f".join(map(str, values)).encode())
+        else:
+            digest.update(np.ascontiguousarray(values).tobytes())
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def stored_hash(path):
+    """The content hash in a partition file's footer, or ``None`` for a missing or unhashed file."""
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+    except FileNotFoundError:
+        return None
+    digest = metadata.get(HASH_KEY)
+    return digest.decode() if digest else None
+
+
+def merge_by_key(stored, rows):
+    """``stored`` with ``rows`` upserted by key: replaced rows keep their position, new keys go last."""
+    combined = pd.concat([_normalize(stored), _normalize(rows)], ignore_index=True)
+    position = combined.groupby(KEY_COLUMNS, sort=False).ngroup()
+    latest = combined.drop_duplicates(KEY_COLUMNS, keep="last")
+    return latest.iloc[np.argsort(position[latest.index].to_numpy(), kind="stable")]
+
+
+def _normalize(df):
+    df = df.reindex(columns=COLUMNS).dropna(subset=KEY_COLUMNS)
+    for col in KEY_COLUMNS:
+        df[col] = df[col].astype(str)
+    for col in COLUMNS[len(KEY_COLUMNS):]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+    return df
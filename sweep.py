@@ -0,0 +1,241 @@
+"""
+Parameter sweep: many scoring configurations in one simulation pass.
+
+Every configuration keeps its own copy of each rating, stored on the last
+axis of one ``lab x parameter x level x config`` array. Each (Parameter,
+Level) group of a month is prepared once for all of them: CV differences,
+one win matrix per distinct tie threshold, and the bonus/penalty flags. Only
+the rating update runs per configuration, vectorised across the config axis.
+In sequential mode that is one pass over the pairs with a vector step per
+pair. In simultaneous mode the whole group is one broadcast.
+
+The ruleset's own constants always run as the baseline. For each
+configuration, the stability table compares the final lab ranking to the
+baseline's. EFLM targets and parameter names come from the ruleset.
+"""
+import itertools
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import perf
+from engine import (EFLM_BONUS, K, MISSING_PENALTY, MODES, RATIO_BONUS, TIE_THRESHOLD, calendar_order,
+                    prepare_submissions, presence_cube)
+from ratings import START_RATING
+from rules import CURRENT, CompiledRules, canonical_parameter
+
+ScoringConfig = namedtuple("ScoringConfig", ["k", "tie_threshold", "ratio_bonus", "eflm_bonus", "missing_penalty"])
+DEFAULT_CONFIG = ScoringConfig(K, TIE_THRESHOLD, RATIO_BONUS, EFLM_BONUS, MISSING_PENALTY)
+CONFIG_COLUMNS = ["K", "Tie Threshold", "Ratio Bonus", "EFLM Bonus", "Missing Penalty"]
+
+SweepResult = namedtuple("SweepResult", ["stability", "final_elo"])
+
+# Upper bound on the config x n x n arrays of one simultaneous update
+SIMULTANEOUS_CHUNK_BYTES = 64 * 2**20
+
+
+def ruleset_config(ruleset):
+    """The ``ScoringConfig`` a ruleset runs with."""
+    return ScoringConfig(ruleset.k, ruleset.tie_threshold, ruleset.ratio_bonus, ruleset.eflm_bonus,
+                         ruleset.missing_penalty)
+
+
+def config_grid(k=(K,), tie_threshold=(TIE_THRESHOLD,), ratio_bonus=(RATIO_BONUS,), eflm_bonus=(EFLM_BONUS,),
+                missing_penalty=(MISSING_PENALTY,)):
+    """Every combination of the given values, as ``ScoringConfig``s."""
+    return [ScoringConfig(*values)
+            for values in itertools.product(k, tie_threshold, ratio_bonus, eflm_bonus, missing_penalty)]
+
+
+# --- Batched rating updates ---
+def _replay_sequential(R, slots, wins_a, wins_b, adjust, k):
+    """
+    ``battle_group``'s sequential replay for every config at once. ``R`` is
+    ``slot x config``; ``wins_a[p]``/``wins_b[p]`` hold each config's result
+    of pair ``p`` for its A and B side; ``adjust`` is ``row x config``.
+    """
+    idx_a, idx_b = np.triu_indices(len(slots), 1)
+    slot = slots.tolist()
+    for p, (i, j) in enumerate(zip(idx_a.tolist(), idx_b.tolist())):
+        si, sj = slot[i], slot[j]
+        Ra, Rb = R[si], R[sj]
+        Ea = 1 / (1 + 10 ** ((Rb - Ra) / 400))
+        Eb = 1 / (1 + 10 ** ((Ra - Rb) / 400))
+
+        R[si] += k * (wins_a[p] - Ea)
+        R[sj] += k * (wins_b[p] - Eb)
+
+        R[si] += adjust[i]
+        R[sj] += adjust[j]
+
+
+def _update_simultaneous(R, slots, wins, adjust, k):
+    """``battle_group``'s simultaneous update for the configs in ``R`` (``slot x config``)."""
+    n = len(slots)
+    start = R[slots].T
+    expected = 1 / (1 + 10 ** ((start[:, None, :] - start[:, :, None]) / 400))
+    delta = k[:, None, None] * (wins - expected)
+    diagonal = np.arange(n)
+    delta[:, diagonal, diagonal] = 0.0
+    row_delta = delta.sum(axis=2) + (n - 1) * adjust.T
+    np.add.at(R, slots, row_delta.T)
+
+
+def _battle_group(R, slots, cv, ratio, target, configs, tie_of, thresholds, mode):
+    k, _, ratio_bonus, eflm_bonus, missing_penalty = configs.T
+    n = len(cv)
+
+    # Same flags as score_labs; only their weights differ per config
+    cv_nan, ratio_nan = np.isnan(cv), np.isnan(ratio)
+    ratio_ok = ~ratio_nan & (ratio >= 1.0)
+    # A NaN target (no EFLM target for the parameter) never matches
+    with np.errstate(invalid="ignore"):
+        eflm_ok = ~cv_nan & (cv <= target)
+    adjust = (np.outer(ratio_ok, ratio_bonus) + np.outer(eflm_ok, eflm_bonus)
+              - np.outer(cv_nan | ratio_nan, missing_penalty))
+
+    # One win matrix per distinct tie threshold, shared by the configs using it
+    diff = cv[:, None] - cv[None, :]
+    with np.errstate(invalid="ignore"):
+        decisive = ~np.isnan(diff)[None] & (np.abs(diff)[None] >= thresholds[:, None, None])
+        wins = decisive & (diff < 0)[None]
+
+    if mode == "sequential":
+        idx_a, idx_b = np.triu_indices(n, 1)
+        wins_a = np.ascontiguousarray(wins[:, idx_a, idx_b][tie_of].T)
+        wins_b = np.ascontiguousarray(wins[:, idx_b, idx_a][tie_of].T)
+        _replay_sequential(R, slots, wins_a, wins_b, adjust, k)
+        return
+
+    step = max(1, SIMULTANEOUS_CHUNK_BYTES // (8 * n * n))
+    for start in range(0, len(configs), step):
+        chunk = slice(start, start + step)
+        _update_simultaneous(R[:, chunk], slots, wins[tie_of[chunk]].astype(float), adjust[:, chunk], k[chunk])
+
+
+# --- Sweep ---
+def sweep_ratings(df, configs, all_params=None, ruleset=None, mode="sequential"):
+    """
+    Final ratings of ``df`` under each of ``configs``, month by month exactly
+    as ``engine.simulate`` runs them with ``ruleset``'s parameter names and
+    EFLM targets. Simultaneous mode matches the engine bit for bit. Sequential
+    mode matches it to within an ulp or so per step, because numpy's
+    vectorised ``pow`` rounds a little differently from Python's. Returns
+    ``(labs, params, levels, elo, present)`` with ``elo`` shaped
+    ``lab x parameter x level x config``.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown battle mode: {mode!r}")
+    ruleset = ruleset or CURRENT
+    configs = np.asarray(configs, dtype=float).reshape(-1, len(ScoringConfig._fields))
+    thresholds, tie_of = np.unique(configs[:, 1], return_inverse=True)
+    penalties = configs[:, 4]
+
+    df = prepare_submissions(df, ruleset)
+    if all_params is not None:
+        all_params = list(dict.fromkeys(canonical_parameter(param, ruleset) for param in all_params))
+    perf.count("rows", len(df))
+    (cube_labs, cube_params, cube_levels, cube_months), submitted = presence_cube(df, all_params)
+    labs = pd.Index(pd.unique(df["Lab"]))
+    params = pd.Index(pd.unique(np.concatenate([np.asarray(cube_params, dtype=object),
+                                                pd.unique(df["Parameter"]).astype(object)])))
+    levels = pd.Index(pd.unique(df["Level"]))
+    targets = CompiledRules(ruleset, params).eflm_targets
+
+    elo = np.full((len(labs), len(params), len(levels), len(configs)), float(START_RATING))
+    present = np.zeros(elo.shape[:3], dtype=bool)
+    # Presence-cube axes -> rating axes
+    cube_lab = labs.get_indexer(cube_labs)
+    cube_param = params.get_indexer(cube_params)
+    cube_level = levels.get_indexer(cube_levels)
+
+    by_month = {month: month_df for month, month_df in df.groupby("Month", sort=False, observed=True)}
+    for month in calendar_order(by_month):
+        month_df = by_month[month]
+        with perf.stage("penalty"):
+            kl, kp, kv = np.nonzero(~submitted[..., cube_months.get_loc(month)])
+            cells = cube_lab[kl], cube_param[kp], cube_level[kv]
+            present[cells] = True
+            elo[cells] -= penalties
+
+        with perf.stage("battles"):
+            for (param, level), group in month_df.groupby(["Parameter", "Level"], observed=True):
+                group_labs = pd.unique(group["Lab"])
+                codes = labs.get_indexer(group_labs)
+                p, l = params.get_loc(param), levels.get_loc(level)
+                present[codes, p, l] = True
+                if len(group) < 2:
+                    continue
+                perf.count("pairs", len(group) * (len(group) - 1) // 2)
+
+                R = elo[codes, p, l]
+                slots = pd.Index(group_labs).get_indexer(group["Lab"])
+                _battle_group(R, slots, group["CV (%)"].to_numpy(dtype=float),
+                              group["Ratio"].to_numpy(dtype=float), targets[p], configs, tie_of,
+                              thresholds, mode)
+                elo[codes, p, l] = R
+
+    return labs, params, levels, elo, present
+
+
+def kendall_tau(x, y, chunk_rows=1024):
+    """Kendall's tau-b of two equally long score vectors, in row chunks of the pair matrix."""
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    n = len(x)
+    if n < 2:
+        return 1.0
+    score, untied_x, untied_y = 0.0, 0, 0
+    for start in range(0, n, chunk_rows):
+        sx = np.sign(x[start:start + chunk_rows, None] - x[None, :])
+        sy = np.sign(y[start:start + chunk_rows, None] - y[None, :])
+        score += (sx * sy).sum()
+        untied_x += np.count_nonzero(sx)
+        untied_y += np.count_nonzero(sy)
+    if not untied_x or not untied_y:
+        return float("nan")
+    return float(score / np.sqrt(float(untied_x) * float(untied_y)))
+
+
+def sweep(df, configs, all_params=None, ruleset=None, mode="sequential"):
+    """
+    Run every configuration in one pass and compare each lab ranking with the
+    baseline (``ruleset``'s own config, added when missing).
+
+    Returns a ``SweepResult``: ``stability`` has one row per config with its
+    champion, whether the champion changed, Kendall's tau-b against the
+    baseline's Final Elo, and the mean and largest rank shift. ``final_elo``
+    has one column of Final Elo per config.
+    """
+    ruleset = ruleset or CURRENT
+    default = ruleset_config(ruleset)
+    configs = [ScoringConfig(*config) for config in configs]
+    if default not in configs:
+        configs = [default] + configs
+    baseline = configs.index(default)
+
+    labs, _, _, elo, present = sweep_ratings(df, configs, all_params, ruleset, mode)
+    with perf.stage("aggregation"):
+        counts = present.sum(axis=(1, 2))
+        rated = np.flatnonzero(counts)
+        final = (elo * present[..., None]).sum(axis=(1, 2))[rated] / counts[rated, None]
+
+        # Rank 1 is the highest Final Elo; ties keep lab order like the leaderboard
+        order = np.argsort(-final, axis=0, kind="stable")
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(1, len(rated) + 1)[:, None], axis=0)
+        champions = np.asarray(labs, dtype=object)[rated][order[0]] if len(rated) else [None] * len(configs)
+
+        shift = np.abs(ranks - ranks[:, [baseline]])
+        stability = pd.DataFrame(configs, columns=CONFIG_COLUMNS)
+        stability.insert(0, "Config", range(len(configs)))
+        stability["Baseline"] = stability["Config"] == baseline
+        stability["Champion"] = champions
+        stability["Champion Changed"] = stability["Champion"] != champions[baseline]
+        stability["Kendall Tau"] = [round(kendall_tau(final[:, baseline], final[:, c]), 4)
+                                    for c in range(len(configs))]
+        stability["Mean Rank Shift"] = shift.mean(axis=0).round(2) if len(rated) else 0.0
+        stability["Max Rank Shift"] = shift.max(axis=0) if len(rated) else 0
+
+        final_elo = pd.DataFrame(final.round(2), index=pd.Index(np.asarray(labs, dtype=object)[rated], name="Lab"))
+    return SweepResult(stability, final_elo)
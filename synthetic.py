@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from engine import EFLM_TARGETS, MONTHS
+from store import COLUMNS
+
+LEVELS = ["L1", "L2"]
+
+
+def generate_submissions(labs=10, parameters=None, levels=LEVELS, months=MONTHS,
+                         missing_rate=0.05, nan_rate=0.02, seed=0):
+    """
+    Seeded, realistic-looking QC submissions for testing and benchmarking.
+
+    Every lab gets a lasting quality factor, so the same labs tend to win across
+    parameters and months. CVs scatter around each parameter's EFLM target.
+    ``parameters`` is a list of names or a count of ``EFLM_TARGETS`` to use.
+    ``missing_rate`` drops whole submissions (for the missing penalty) and
+    ``nan_rate`` blanks CV and Ratio values independently.
+    """
+    rng = np.random.default_rng(seed)
+    if parameters is None:
+        parameters = list(EFLM_TARGETS)
+    elif isinstance(parameters, int):
+        parameters = list(EFLM_TARGETS)[:parameters]
+    parameters, levels, months = list(parameters), list(levels), list(months)
+
+    width = len(str(labs))
+    lab_names = np.array([f"Lab_{i + 1:0{width}d}" for i in range(labs)], dtype=object)
+    targets = np.array([EFLM_TARGETS.get(param, 3.0) for param in parameters])
+
+    # Full lab x month x parameter x level grid, one row per cell
+    lab_idx, month_idx, param_idx, level_idx = (axis.ravel() for axis in np.indices(
+        (labs, len(months), len(parameters), len(levels))))
+    n = len(lab_idx)
+
+    lab_quality = rng.lognormal(mean=0.0, sigma=0.35, size=labs)
+    cv = targets[param_idx] * lab_quality[lab_idx] * rng.lognormal(mean=-0.1, sigma=0.25, size=n)
+    n_qc = rng.integers(15, 45, size=n)
+    working_days = rng.integers(18, 24, size=n)
+    ratio = np.round(n_qc / working_days, 2)
+
+    cv = np.round(cv, 2)
+    cv[rng.random(n) < nan_rate] = np.nan
+    ratio[rng.random(n) < nan_rate] = np.nan
+
+    df = pd.DataFrame({
+        "Lab": lab_names[lab_idx],
+        "Parameter": np.asarray(parameters, dtype=object)[param_idx],
+        "Level": np.asarray(levels, dtype=object)[level_idx],
+        "Month": np.asarray(months, dtype=object)[month_idx],
+        "CV (%)": cv,
+        "n (QC)": n_qc,
+        "Working Days": working_days,
+        "Ratio": ratio
+    }, columns=COLUMNS)
+    return df[rng.random(n) >= missing_rate].reset_index(drop=True)
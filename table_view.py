@@ -0,0 +1,127 @@
+"""
+Paginated tables with Lab/Parameter/Level/Month filters and column selection.
+
+``show_table`` asks its source for one page at a time. The source applies the
+filters, picks the columns and slices out the page before anything becomes
+a DataFrame for Streamlit, so only the visible rows are ever sent to the
+browser. ``FrameSource`` wraps an in-memory frame (submissions, progression);
+``ArchiveSource`` pushes the filters into the battle archive's Parquet scan.
+"""
+import pandas as pd
+import streamlit as st
+
+from battle_archive import SCHEMA
+from engine import calendar_order
+
+FILTER_COLUMNS = ["Lab", "Parameter", "Level", "Month"]
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def _sorted_options(column, values):
+    values = [value for value in values if not pd.isna(value)]
+    if column == "Month":
+        return calendar_order(values)
+    return sorted(values, key=str)
+
+
+def archive_filters(filters):
+    """``show_table`` filters as ``BattleArchive.query`` keyword arguments."""
+    return {
+        "labs": filters.get("Lab"),
+        "parameters": filters.get("Parameter"),
+        "levels": filters.get("Level"),
+        "months": filters.get("Month"),
+    }
+
+
+class FrameSource:
+    """Rows of an in-memory DataFrame; filters are ``isin`` masks."""
+
+    def __init__(self, df):
+        self.df = df
+        self.columns = list(df.columns)
+
+    def filters(self):
+        return [column for column in FILTER_COLUMNS if column in self.df.columns]
+
+    def options(self, column):
+        return _sorted_options(column, pd.unique(self.df[column]))
+
+    def _mask(self, filters):
+        mask = None
+        for column, values in filters.items():
+            match = self.df[column].isin(values).to_numpy()
+            mask = match if mask is None else mask & match
+        return mask
+
+    def count(self, filters):
+        mask = self._mask(filters)
+        return len(self.df) if mask is None else int(mask.sum())
+
+    def page(self, filters, columns, offset, limit):
+        mask = self._mask(filters)
+        rows = self.df if mask is None else self.df[mask]
+        return rows.iloc[offset:offset + limit][columns]
+
+
+class ArchiveSource:
+    """
+    Battles from a ``BattleArchive``. The Lab filter matches either side of a
+    battle. ``options`` gives the Lab/Parameter/Level choices (the archive has
+    no cheap list of them); months come from the archive's partitions.
+    """
+
+    def __init__(self, archive, options):
+        self.archive = archive
+        self._options = options
+        self.columns = SCHEMA.names
+
+    def filters(self):
+        return [column for column in FILTER_COLUMNS if column == "Month" or column in self._options]
+
+    def options(self, column):
+        if column == "Month":
+            return self.archive.months()
+        return _sorted_options(column, self._options[column])
+
+    def count(self, filters):
+        return self.archive.count(**archive_filters(filters))
+
+    def page(self, filters, columns, offset, limit):
+        return self.archive.query(columns=columns, offset=offset, limit=limit, **archive_filters(filters))
+
+
+def show_table(source, key, default_columns=None):
+    """
+    Filter, column and page controls plus the current page of ``source``.
+    Widget state lives under ``key``. Returns the active filters as
+    ``{column: values}`` so callers can reuse them.
+    """
+    available = source.filters()
+    filters = {}
+    for col, column in zip(st.columns(len(available)) if available else [], available):
+        values = col.multiselect(column, source.options(column), key=f"{key}_filter_{column}")
+        if values:
+            filters[column] = values
+
+    columns = st.multiselect("Columns", source.columns, default=default_columns or source.columns,
+                             key=f"{key}_columns") or source.columns
+
+    total = source.count(filters)
+    col1, col2 = st.columns(2)
+    size = col1.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+    pages = max(1, -(-total // size))
+    # A narrower filter can leave the remembered page past the end
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = col2.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, step=1, key=page_key)
+
+    offset = (int(page) - 1) * size
+    rows = source.page(filters, columns, offset, size)
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+    if total:
+        st.caption(f"Rows {offset + 1:,}–{offset + len(rows):,} of {total:,}")
+    else:
+        st.caption("No matching rows.")
+    return filters
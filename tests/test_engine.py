@@ -0,0 +1,116 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from battle_archive import BattleArchive
+from engine import MONTHS, Checkpoints, battle_group, simulate
+from rules import RULESET_2025_1
+from synthetic import generate_submissions
+
+RULES = RULESET_2025_1
+
+
+def reference_group(ratings, rows, target):
+    """The original per-pair loop: ``rows`` are ``(slot, cv, ratio)``, ``ratings`` a dict updated in place."""
+    battles = []
+    for (a, cv_a, r_a), (b, cv_b, r_b) in itertools.combinations(rows, 2):
+        penalty_a = RULES.missing_penalty if math.isnan(cv_a) or math.isnan(r_a) else 0
+        penalty_b = RULES.missing_penalty if math.isnan(cv_b) or math.isnan(r_b) else 0
+
+        if math.isnan(cv_a) or math.isnan(cv_b) or abs(cv_a - cv_b) < RULES.tie_threshold:
+            win_a = win_b = 0
+        elif cv_a < cv_b:
+            win_a, win_b = 1, 0
+        else:
+            win_a, win_b = 0, 1
+
+        bonus_a = RULES.ratio_bonus if not math.isnan(r_a) and r_a >= 1.0 else 0
+        bonus_b = RULES.ratio_bonus if not math.isnan(r_b) and r_b >= 1.0 else 0
+        if target is not None and not math.isnan(cv_a) and cv_a <= target:
+            bonus_a += RULES.eflm_bonus
+        if target is not None and not math.isnan(cv_b) and cv_b <= target:
+            bonus_b += RULES.eflm_bonus
+
+        Ra, Rb = ratings[a], ratings[b]
+        Ea = 1 / (1 + 10 ** ((Rb - Ra) / 400))
+        Eb = 1 / (1 + 10 ** ((Ra - Rb) / 400))
+        ratings[a] += RULES.k * (win_a - Ea)
+        ratings[b] += RULES.k * (win_b - Eb)
+        ratings[a] += bonus_a - penalty_a
+        ratings[b] += bonus_b - penalty_b
+        battles.append((ratings[a], ratings[b]))
+    return battles
+
+
+@pytest.mark.parametrize("target", [None, 3.0])
+@pytest.mark.parametrize("seed", range(5))
+def test_sequential_matches_pairwise_loop(seed, target):
+    rng = np.random.default_rng(seed)
+    n = 12
+    # Coarse CVs make exact and within-threshold ties common
+    cv = rng.choice([1.0, 2.0, 2.05, 2.1, 2.95, 3.0, 3.04, 4.5, np.nan], size=n)
+    ratio = rng.choice([0.5, 0.99, 1.0, 1.7, np.nan], size=n)
+    # Slot 0 appears twice: a lab that submitted two rows shares one rating
+    slots = np.array([0, 1, 2, 0] + list(range(3, n - 1)))
+    start = 1500 + rng.normal(0, 40, size=n - 1)
+
+    ratings = start.copy()
+    result = battle_group(ratings, slots, cv, ratio, target, mode="sequential", ruleset=RULES)
+
+    expected = dict(enumerate(start.tolist()))
+    battles = reference_group(expected, list(zip(slots.tolist(), cv.tolist(), ratio.tolist())), target)
+
+    assert ratings.tolist() == [expected[slot] for slot in range(n - 1)]
+    assert list(zip(result.updated_a.tolist(), result.updated_b.tolist())) == battles
+
+
+def test_tie_within_threshold_scores_no_win_for_either_lab():
+    ratings = np.array([1500.0, 1500.0])
+    result = battle_group(ratings, [0, 1], [2.0, 2.09], [np.nan, np.nan], mode="sequential", ruleset=RULES)
+    # As in the original loop a tie scores 0 (not 0.5) for both, on top of the missing-ratio penalty
+    assert ratings.tolist() == [1500.0 - RULES.k / 2 - RULES.missing_penalty] * 2
+    assert result.penalty.tolist() == [RULES.missing_penalty] * 2
+
+
+def test_dropping_the_last_month_drops_its_battles(tmp_path):
+    df = generate_submissions(4, months=MONTHS[:3], seed=2)
+    checkpoints = Checkpoints()
+    archive = BattleArchive(str(tmp_path / "battles"))
+    simulate(df, checkpoints, archive=archive)
+    assert archive.months() == MONTHS[:3]
+
+    result = simulate(df[df["Month"] != MONTHS[2]], checkpoints, archive=archive)
+    assert result.resumed_from is None
+    assert checkpoints.months == MONTHS[:2]
+    assert archive.months() == MONTHS[:2]
+
+
+def test_battle_progress_advances_one_group_at_a_time():
+    df = generate_submissions(3, months=MONTHS[:2], seed=6)
+    calls = []
+    simulate(df, Checkpoints(), progress=lambda stage, done, total: calls.append((stage, done, total)))
+
+    battles = [(done, total) for stage, done, total in calls if stage == "battles"]
+    done = [done for done, _ in battles]
+    total = battles[-1][1]
+    assert done == sorted(done)
+    assert set(done) == set(range(total + 1))
+
+
+def test_progress_can_abort_a_month_between_groups(tmp_path):
+    class Cancelled(Exception):
+        pass
+
+    def progress(stage, done, total):
+        if stage == "battles" and done == 3:
+            raise Cancelled()
+
+    checkpoints = Checkpoints()
+    archive = BattleArchive(str(tmp_path / "battles"))
+    with pytest.raises(Cancelled):
+        simulate(generate_submissions(3, months=MONTHS[:2], seed=6), checkpoints, archive=archive,
+                 progress=progress)
+    assert checkpoints.months == []
+    assert archive.months() == []
@@ -0,0 +1,31 @@
+import time
+
+from battle_archive import BattleArchive
+from engine import MONTHS, RESULTS_DB_FILE
+from jobs import JobRunner
+from results_db import ResultsDB
+from synthetic import generate_submissions
+
+
+def run_job(runner, df, timeout=60):
+    job = runner.submit(df)
+    deadline = time.time() + timeout
+    while job.active and time.time() < deadline:
+        time.sleep(0.05)
+    assert job.status == "done", job.error
+    return job
+
+
+def test_dropped_trailing_month_leaves_the_published_archive(tmp_path):
+    runner = JobRunner(str(tmp_path), str(tmp_path / "battles"))
+    archive = BattleArchive(runner.battles_dir)
+    df = generate_submissions(4, months=MONTHS[:3], seed=4)
+
+    run_job(runner, df)
+    assert archive.months() == MONTHS[:3]
+
+    # The remaining months are unchanged, so nothing is recomputed
+    job = run_job(runner, df[df["Month"] != MONTHS[2]])
+    assert job.recomputed == []
+    assert archive.months() == MONTHS[:2]
+    assert ResultsDB(str(tmp_path / RESULTS_DB_FILE)).load_checkpoints().months == MONTHS[:2]
@@ -0,0 +1,64 @@
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from engine import MONTHS, Checkpoints, simulate
+from results_db import ResultsDB
+from synthetic import generate_submissions
+
+
+def values(progression):
+    return progression.astype({col: str for col in ["Month", "Lab", "Parameter", "Level"]}).reset_index(drop=True)
+
+
+def mark_snapshots(path, months):
+    """Set a sentinel Elo in each month's first snapshot row; a rewrite of the month loses it."""
+    with closing(sqlite3.connect(path)) as conn, conn:
+        for month in months:
+            conn.execute("UPDATE snapshots SET elo = -1 WHERE rowid = "
+                         "(SELECT MIN(rowid) FROM snapshots WHERE month = ?)", (month,))
+
+
+def marked(path, month):
+    with closing(sqlite3.connect(path)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM snapshots WHERE month = ? AND elo = -1", (month,)).fetchone()[0] == 1
+
+
+def test_resuming_from_the_database_matches_a_full_recompute(tmp_path):
+    path = str(tmp_path / "results.db")
+    df = generate_submissions(6, months=MONTHS[:4], seed=5)
+    checkpoints = Checkpoints()
+    simulate(df, checkpoints)
+    assert ResultsDB(path).save(checkpoints)
+
+    # Change March only: January and February are reused from the database
+    changed = df.copy()
+    changed.loc[changed["Month"] == MONTHS[2], "CV (%)"] += 0.5
+    resumed = simulate(changed, ResultsDB(path).load_checkpoints())
+    full = simulate(changed, Checkpoints())
+
+    assert resumed.resumed_from == MONTHS[2]
+    pd.testing.assert_frame_equal(resumed.ratings.to_frame(), full.ratings.to_frame())
+    pd.testing.assert_frame_equal(resumed.leaderboard, full.leaderboard)
+    pd.testing.assert_frame_equal(values(resumed.progression), values(full.progression))
+
+
+def test_save_keeps_unchanged_leading_months(tmp_path):
+    path = str(tmp_path / "results.db")
+    db = ResultsDB(path)
+    df = generate_submissions(6, months=MONTHS[:4], seed=5)
+    checkpoints = Checkpoints()
+    simulate(df, checkpoints)
+    db.save(checkpoints)
+    mark_snapshots(path, MONTHS[:4])
+
+    changed = df.copy()
+    changed.loc[changed["Month"] == MONTHS[2], "CV (%)"] += 0.5
+    checkpoints = db.load_checkpoints()
+    simulate(changed, checkpoints)
+    assert db.save(checkpoints)
+
+    # Leading months keep their rows; the changed month and everything after it is rewritten
+    assert [marked(path, month) for month in MONTHS[:4]] == [True, True, False, False]
+    assert not db.save(checkpoints)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from store import COLUMNS, KEY_COLUMNS, SubmissionStore, merge_by_key
+
+
+def rows(lab, month, cvs, params=("ALT", "AST", "Urea")):
+    return pd.DataFrame({
+        "Lab": lab, "Parameter": list(params[:len(cvs)]), "Level": "L1", "Month": month,
+        "CV (%)": cvs, "n (QC)": 20.0, "Working Days": 20.0, "Ratio": 1.0,
+    })[COLUMNS]
+
+
+def stored(store, lab=None, month=None):
+    df = store.scan(labs=None if lab is None else [lab], months=None if month is None else [month])
+    return df.astype({col: str for col in KEY_COLUMNS}).sort_values(KEY_COLUMNS).reset_index(drop=True)
+
+
+def test_resubmitting_a_lab_month_replaces_its_rows(tmp_path):
+    store = SubmissionStore(str(tmp_path))
+    store.append(rows("Lab_1", "Jan", [1.0, 2.0]))
+    store.append(rows("Lab_1", "Jan", [5.0, 6.0]))
+
+    jan = stored(store, "Lab_1", "Jan")
+    assert jan["CV (%)"].tolist() == [5.0, 6.0]
+    assert len(jan) == 2
+
+
+def test_new_keys_are_added_and_replaced_rows_keep_their_place():
+    old = rows("Lab_1", "Jan", [1.0, 2.0])
+    new = rows("Lab_1", "Jan", [7.0, 8.0, 9.0], params=("Urea", "AST", "ALT"))
+    merged = merge_by_key(old, new)
+    assert merged["Parameter"].tolist() == ["ALT", "AST", "Urea"]
+    assert merged["CV (%)"].tolist() == [9.0, 8.0, 7.0]
+
+
+def test_other_labs_and_months_are_untouched(tmp_path):
+    store = SubmissionStore(str(tmp_path))
+    store.append(pd.concat([rows("Lab_1", "Jan", [1.0, 2.0]), rows("Lab_2", "Jan", [3.0, np.nan]),
+                            rows("Lab_1", "Feb", [4.0])]))
+    lab_2, feb = stored(store, "Lab_2"), stored(store, month="Feb")
+
+    store.append(rows("Lab_1", "Jan", [9.0, 9.0, 9.0]))
+
+    pd.testing.assert_frame_equal(stored(store, "Lab_2"), lab_2)
+    pd.testing.assert_frame_equal(stored(store, month="Feb"), feb)
+    assert stored(store, "Lab_1", "Jan")["CV (%)"].tolist() == [9.0, 9.0, 9.0]
+
+
+def test_replace_lab_months_only_rewrites_the_given_months(tmp_path):
+    store = SubmissionStore(str(tmp_path))
+    store.append(pd.concat([rows("Lab_1", "Jan", [1.0, 2.0]), rows("Lab_1", "Feb", [3.0]),
+                            rows("Lab_2", "Jan", [4.0])]))
+
+    # Lab_1's Jan is replaced by one row; Feb is not listed so it stays
+    store.replace_lab_months("Lab_1", rows("Lab_1", "Jan", [5.0]), ["Jan"])
+    assert stored(store, "Lab_1")[["Month", "CV (%)"]].values.tolist() == [["Feb", 3.0], ["Jan", 5.0]]
+    assert stored(store, "Lab_2")["CV (%)"].tolist() == [4.0]
+
+    # A listed month without rows deletes the lab's rows for it
+    store.replace_lab_months("Lab_1", rows("Lab_1", "Jan", [5.0]), ["Feb"])
+    assert stored(store, "Lab_1")["Month"].tolist() == ["Jan"]
+
+
+def test_identical_append_writes_nothing(tmp_path):
+    store = SubmissionStore(str(tmp_path))
+    df = pd.concat([rows("Lab_1", "Jan", [1.0, 2.0]), rows("Lab_2", "Feb", [3.0])])
+    assert store.append(df) == 2
+    assert store.append(df) == 0
+    assert store.append(df.iloc[::-1]) == 0